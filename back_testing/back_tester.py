@@ -1,24 +1,36 @@
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 from itertools import product
+from typing import Iterator, Optional
 
-from trading_strategies import Strategy, StrategyTester
+import numpy as np
+from loguru import logger
 
+from back_testing.ledger import TradeLedger
+from back_testing.optimizer import (
+    ETA,
+    MIN_WINDOW_BARS,
+    Candidate,
+    ParameterSpace,
+    successive_halving,
+)
+from back_testing.parallel import SweepReport, run_parallel
+from back_testing.pricing import synthesize_option_history
+from back_testing.results import TOP_K, ResultStore, TopK, param_type
+from data_visualization.candle_store import CandleStore
+from exit_rules import EXIT_RULES, SECONDS_PER_DAY, ExitEngine, ExitRules
+from trading_strategies import IndicatorCache, Strategy, StrategyTester
 
-@dataclass
-class Trade:
-    buy_date: datetime
-    sell_date: datetime
-    buy_price: Decimal
-    sell_price: Decimal
+POSITION = "backtest"  # back_test only ever holds one position at a time
 
 
 @dataclass
 class TestOutput:
     profit: Decimal
     loss: Decimal
-    trades: list[Trade]
+    trades: TradeLedger  # iterate it for `Trade`s
 
 
 class BackTester:
@@ -28,47 +40,266 @@ class BackTester:
         ticker: str,
         start_date: datetime,
         end_date: datetime,
+        workers: Optional[int] = 1,
+        chunk_size: int = 256,
+        candle_store: Optional[CandleStore] = None,
     ):
+        """
+        - workers: 1 runs the sweep serially, None uses every core, N uses N processes
+        - chunk_size: how many variations each worker process gets per task
+        - candle_store: where the 1m candles come from (defaults to data_visualization/ticker_data)
+        """
         self.strategy_tester = strategy_tester
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.candle_store = candle_store or CandleStore()
+        self.report: Optional[SweepReport] = None
+        self.top_params: list[dict] = []  # parameters of what the last `run` returned
 
-    def fetch_options_pricing_history(self) -> dict:
-        # fetch options pricing history
-        return {}
+    def fetch_options_pricing_history(self, stock_history: dict) -> dict:
+        # No historical option quotes to buy, so they're priced off the candles (see pricing.py)
+        return synthesize_option_history(stock_history)
 
     def fetch_stock_price_history(self) -> dict:
-        # fetch stock price history
-        return {}
+        # 1m candles as columns -> {"t": epoch ms, "o", "h", "l", "c", "v"}
+        # + every indicator series the sweep needs, computed once before any variation runs
+        candles = self.candle_store.read(self.ticker, self.start_date, self.end_date)
+        return IndicatorCache(dict(candles)).precompute(self.strategy_tester.indicators)
 
-    def create_strategy_variations(self) -> list[Strategy]:
+    def parameter_combinations(self) -> tuple[list[str], Iterator[tuple]]:
+        """Parameter names + a lazy iterator over every combination of their ranges"""
         strat_params = self.strategy_tester.strategy_parameters
         param_ranges = {
             key: range(value[0], value[1] + 1) for key, value in strat_params.items()
         }
-        param_combinations = list(product(*param_ranges.values()))
-        return [
+        return list(param_ranges.keys()), product(*param_ranges.values())
+
+    def create_strategy_variations(self) -> Iterator[Strategy]:
+        param_names, param_combinations = self.parameter_combinations()
+        # Every variation starts with no data, `back_test` feeds it the price history.
+        # Built one at a time as they're tested - the full grid is tens of thousands of strategies
+        return (
             self.strategy_tester.strategy_type(
-                **dict(zip(param_ranges.keys(), combination))
+                [], **dict(zip(param_names, combination))
             )
             for combination in param_combinations
-        ]
+        )
 
-    def run(self):
-        options_history = self.fetch_options_pricing_history()
+    def iter_results(self, with_params: bool = False) -> Iterator:
+        """
+        Streams a `TestOutput` per strategy variation as soon as it's been tested
+        - with_params: yield (combination, TestOutput) pairs instead
+        """
         stock_history = self.fetch_stock_price_history()
-        strategy_variations = self.create_strategy_variations()
-        test_outputs = []
-        for strategy in strategy_variations:
-            test_outputs.append(back_test(strategy, options_history, stock_history))
-        test_outputs.sort(key=lambda x: x.profit, reverse=True)
-        return test_outputs
+        options_history = self.fetch_options_pricing_history(stock_history)
+        param_names, param_combinations = self.parameter_combinations()
+        if self.workers == 1:
+            started = time.perf_counter()
+            tested = 0
+            strategy_type = self.strategy_tester.strategy_type
+            for combination in param_combinations:
+                tested += 1
+                strategy = strategy_type([], **dict(zip(param_names, combination)))
+                output = back_test(strategy, options_history, stock_history)
+                yield (combination, output) if with_params else output
+            self.report = SweepReport(tested, 1, time.perf_counter() - started)
+            logger.info(f"Back test sweep done - {self.report}")
+            return
 
+        report = []
+        yield from run_parallel(
+            back_test,
+            self.strategy_tester.strategy_type,
+            param_names,
+            param_combinations,
+            options_history,
+            stock_history,
+            workers=self.workers,
+            chunk_size=self.chunk_size,
+            report=report,
+            with_params=with_params,
+        )
+        self.report = report[0]
 
-# I want to make this async so we can run multiple backtests simultaneously.
-# There will be thousands of variations to test so we need to run them in parallel
+    def run(
+        self,
+        top_k: int = TOP_K,
+        store: Optional[ResultStore] = None,
+        run_name: Optional[str] = None,
+    ) -> list[TestOutput]:
+        """
+        The `top_k` most profitable variations, best first. Only those keep their trades in memory,
+        every variation's summary goes to `store` (if given) as it finishes - see results.py
+        """
+        param_names, _ = self.parameter_combinations()
+        ranges = self.strategy_tester.strategy_parameters
+        top = TopK(top_k, key=lambda result: result[1].profit)
+        writer = store and store.create(
+            param_names,
+            run_name,
+            param_types={name: param_type(*ranges[name]) for name in param_names},
+            ticker=self.ticker,
+            strategy=self.strategy_tester.strategy_type.__name__,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        try:
+            for combination, output in self.iter_results(with_params=True):
+                if writer:
+                    writer.append(combination, output)
+                top.push((combination, output))
+        finally:
+            if writer:
+                writer.close()
+        self.top_params = [dict(zip(param_names, c)) for c, _ in top.items()]
+        return [output for _, output in top.items()]
+
+    def optimize(
+        self,
+        samples: Optional[int] = 500,
+        method: str = "lhs",
+        eta: int = ETA,
+        min_bars: int = MIN_WINDOW_BARS,
+        seed: Optional[int] = None,
+    ) -> list[Candidate]:
+        """
+        Searches the parameter ranges instead of sweeping all of them (see optimizer.py):
+        `samples` candidates picked by `method` ("lhs", "random" or "grid"), then successive
+        halving from `min_bars` up to the full history. Best candidates first.
+        """
+        space = ParameterSpace(self.strategy_tester.strategy_parameters)
+        stock_history = self.fetch_stock_price_history()
+        started = time.perf_counter()
+        candidates = successive_halving(
+            back_test,
+            self.strategy_tester.strategy_type,
+            space.names,
+            space.sample(samples, method, seed),
+            self.fetch_options_pricing_history(stock_history),
+            stock_history,
+            eta=eta,
+            min_bars=min_bars,
+            workers=self.workers,
+            chunk_size=self.chunk_size,
+        )
+        logger.info(
+            f"Optimized over {min(samples or space.size, space.size)}/{space.size}"
+            f" combinations in {time.perf_counter() - started:.2f}s"
+        )
+        return candidates
+
+
+# Runs in the worker processes when `workers != 1` so it has to stay a module-level function
 def back_test(
-    strategy: Strategy, options_history: dict, stock_history: dict
+    strategy: Strategy,
+    options_history: dict,
+    stock_history: dict,
+    exit_rules: ExitRules = EXIT_RULES,
 ) -> TestOutput:
-    pass
+    """
+    Replays the 1m closes through the strategy, one position at a time.
+    With an options history it buys the at-the-money call and trades its price, otherwise the stock.
+    Exits go through the same `ExitEngine` as live trading so simulated and live exits match.
+    """
+    # Indicators computed once per history and shared by every variation, see IndicatorCache
+    cache = IndicatorCache(stock_history)
+    exits = ExitEngine(exit_rules)
+    if (signals := strategy.signals(cache)) is not None:
+        trades = _replay_signals(*signals, options_history, stock_history, exits)
+    else:
+        strategy.use_indicators(cache)
+        trades = _replay_ticks(strategy, options_history, stock_history, exits)
+
+    pnl = trades.exact_pnl
+    return TestOutput(
+        profit=sum((p for p in pnl if p > 0), Decimal(0)),
+        loss=sum((p for p in pnl if p < 0), Decimal(0)),
+        trades=trades,
+    )
+
+
+def _replay_ticks(
+    strategy: Strategy, options_history: dict, stock_history: dict, exits: ExitEngine
+) -> TradeLedger:
+    calls = options_history.get("call")
+    contract = None  # strike column of the call we're holding
+    trades = TradeLedger()
+    entry = None  # (epoch ms, price)
+    for i, (t, close) in enumerate(
+        zip(stock_history.get("t", ()), stock_history.get("c", ()))
+    ):
+        now = t / 1000
+        close = float(close)
+        strategy.update(close)
+        if entry:
+            price = close if calls is None else float(calls[i, contract])
+            intent = exits.update(POSITION, price, now)
+            if intent is None and not strategy.should_sell():
+                continue
+            exits.close(POSITION)
+            trades.append(entry[0], int(t), entry[1], price)
+            entry = None
+        elif not exits.past_deadline(now) and strategy.should_buy():
+            contract = _at_the_money(options_history, i)
+            price = close if calls is None else float(calls[i, contract])
+            exits.open(POSITION, price, now)
+            entry = (int(t), price)
+    return trades
+
+
+def _replay_signals(
+    buy: np.ndarray,
+    sell: np.ndarray,
+    options_history: dict,
+    stock_history: dict,
+    exits: ExitEngine,
+) -> TradeLedger:
+    """
+    Same trades as `_replay_ticks`, from whole-history buy/sell signal arrays: it jumps straight
+    to the next bar it could buy at and only walks bar by bar while holding (the stops need every price)
+    """
+    t = np.asarray(stock_history.get("t", ()), dtype=np.int64)
+    trades = TradeLedger()
+    if not len(t):
+        return trades
+    seconds = t / 1000
+    closes = np.asarray(stock_history["c"], dtype=np.float64)
+    days = (seconds // SECONDS_PER_DAY).astype(np.int64)
+    deadlines = {
+        day: exits.deadline_for(day * SECONDS_PER_DAY) for day in set(days.tolist())
+    }
+    before_deadline = seconds < np.array([deadlines[day] for day in days.tolist()])
+    entries = np.flatnonzero(buy & before_deadline)
+    calls = options_history.get("call")
+    prices = closes.tolist() if calls is None else None
+    contracts = {}  # strike column -> its prices, converted the first time it's bought
+    sell = sell.tolist()
+    seconds = seconds.tolist()
+    t = t.tolist()
+
+    cursor = 0  # first bar we could buy at
+    while (k := np.searchsorted(entries, cursor)) < len(entries):
+        bought = int(entries[k])
+        if calls is not None:
+            contract = _at_the_money(options_history, bought)
+            if (prices := contracts.get(contract)) is None:
+                prices = contracts[contract] = calls[:, contract].tolist()
+        exits.open(POSITION, prices[bought], seconds[bought])
+        for j in range(bought + 1, len(seconds)):
+            if exits.update(POSITION, prices[j], seconds[j]) or sell[j]:
+                exits.close(POSITION)
+                trades.append(t[bought], t[j], prices[bought], prices[j])
+                break
+        else:
+            break  # still holding at the end of the history
+        cursor = j + 1  # no buying back on the bar we sold at
+    return trades
+
+
+def _at_the_money(options_history: dict, i: int) -> Optional[int]:
+    """Strike column of the call to buy at bar `i`, see `weekly_ladders`"""
+    atm = options_history.get("atm")
+    return None if atm is None else int(atm[i])
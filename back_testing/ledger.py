@@ -0,0 +1,169 @@
+"""
+Backtest trades as a struct of arrays instead of a `Trade` object per fill:
+- 4 columns (buy/sell time as epoch ms int64, buy/sell price float64) that grow by doubling,
+  so `append` is amortized O(1) and a trade costs 32 bytes
+- P&L, win rate, drawdown... are one vectorized op over the columns (floats - `exact_pnl`
+  has the Decimal P&L that money totals are summed from)
+- Pickles as 4 compact arrays, and `columns()` / `from_columns()` go through
+  `SharedHistory` memmaps without a copy
+- `ledger[i]` / iterating still gives `Trade`s for the code that wants rows
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterator
+
+import numpy as np
+
+from numeric import to_decimal
+
+COLUMNS = {
+    "buy_time": np.dtype("<i8"),
+    "sell_time": np.dtype("<i8"),
+    "buy_price": np.dtype("<f8"),
+    "sell_price": np.dtype("<f8"),
+}
+INITIAL_CAPACITY = 16
+
+
+@dataclass
+class Trade:
+    buy_date: datetime
+    sell_date: datetime
+    buy_price: Decimal
+    sell_price: Decimal
+
+
+class TradeLedger:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._columns = {
+            name: np.empty(capacity, dtype) for name, dtype in COLUMNS.items()
+        }
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> "TradeLedger":
+        """Wraps existing columns (i.e. memmaps) without copying - appending to it copies them first"""
+        ledger = cls(0)
+        ledger._columns = {name: columns[name] for name in COLUMNS}
+        ledger._size = len(columns["buy_time"])
+        return ledger
+
+    def append(
+        self, buy_time: int, sell_time: int, buy_price: float, sell_price: float
+    ) -> None:
+        """Times in epoch ms"""
+        if self._size == len(self._columns["buy_time"]) or not self._writeable:
+            self._grow()
+        i = self._size
+        self._columns["buy_time"][i] = buy_time
+        self._columns["sell_time"][i] = sell_time
+        self._columns["buy_price"][i] = buy_price
+        self._columns["sell_price"][i] = sell_price
+        self._size += 1
+
+    @property
+    def _writeable(self) -> bool:
+        return self._columns["buy_time"].flags.writeable
+
+    def _grow(self) -> None:
+        capacity = max(INITIAL_CAPACITY, 2 * self._size)
+        for name, values in self._columns.items():
+            grown = np.empty(capacity, COLUMNS[name])
+            grown[: self._size] = values[: self._size]
+            self._columns[name] = grown
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Views of the filled part of every column"""
+        return {name: values[: self._size] for name, values in self._columns.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Trade:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("trade index out of range")
+        c = self._columns
+        return Trade(
+            buy_date=datetime.fromtimestamp(c["buy_time"][index] / 1000, timezone.utc),
+            sell_date=datetime.fromtimestamp(
+                c["sell_time"][index] / 1000, timezone.utc
+            ),
+            buy_price=to_decimal(c["buy_price"][index]),
+            sell_price=to_decimal(c["sell_price"][index]),
+        )
+
+    def __iter__(self) -> Iterator[Trade]:
+        return (self[i] for i in range(self._size))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TradeLedger):
+            return NotImplemented
+        mine, theirs = self.columns(), other.columns()
+        return all(np.array_equal(mine[name], theirs[name]) for name in COLUMNS)
+
+    def __getstate__(self) -> dict:
+        # Just the filled part - a ledger with spare capacity pickles as small as an exact one
+        return {
+            name: np.ascontiguousarray(values)
+            for name, values in self.columns().items()
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self._columns = state
+        self._size = len(state["buy_time"])
+
+    def __repr__(self) -> str:
+        return f"TradeLedger({self._size} trades, net {self.net:.2f})"
+
+    @property
+    def pnl(self) -> np.ndarray:
+        columns = self.columns()
+        return columns["sell_price"] - columns["buy_price"]
+
+    @property
+    def exact_pnl(self) -> list[Decimal]:
+        """P&L of every trade from the Decimal prices - no float rounding, for the money totals"""
+        columns = self.columns()
+        return [
+            to_decimal(sell) - to_decimal(buy)
+            for buy, sell in zip(
+                columns["buy_price"].tolist(), columns["sell_price"].tolist()
+            )
+        ]
+
+    @property
+    def profit(self) -> float:
+        pnl = self.pnl
+        return float(pnl[pnl > 0].sum())
+
+    @property
+    def loss(self) -> float:
+        pnl = self.pnl
+        return float(pnl[pnl < 0].sum())
+
+    @property
+    def net(self) -> float:
+        return float(self.pnl.sum())
+
+    @property
+    def wins(self) -> int:
+        return int((self.pnl > 0).sum())
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self._size if self._size else 0.0
+
+    @property
+    def equity(self) -> np.ndarray:
+        """Running P&L after each trade"""
+        return np.cumsum(self.pnl)
+
+    @property
+    def max_drawdown(self) -> float:
+        """Biggest drop from a running P&L high (starting from 0) - a positive number"""
+        equity = np.r_[0.0, self.equity]
+        return float((np.maximum.accumulate(equity) - equity).max())
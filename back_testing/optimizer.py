@@ -0,0 +1,186 @@
+"""
+Finds good strategy parameters without testing every combination.
+
+- `ParameterSpace` generates candidates lazily: the full grid as an iterator, or a random /
+  Latin hypercube sample of it (spread evenly over each parameter's range)
+- `successive_halving` tests every candidate on a short window of the history, keeps the
+  best 1/eta of them, tests those on an eta times longer window... until the survivors
+  get the full history
+
+    tester = BackTester(MovingAverageStrategyTester(), "AAPL", start, end)
+    best = tester.optimize(samples=500)[0]
+"""
+
+import math
+from dataclasses import dataclass
+from itertools import product
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from loguru import logger
+
+from back_testing.parallel import run_parallel
+
+SAMPLING_METHODS = ("lhs", "random", "grid")
+ETA = 3  # 1/ETA of the candidates survive each rung
+# Shortest window anything gets judged on - one session of 1m bars
+MIN_WINDOW_BARS = 390
+# Option history columns that aren't one row per bar
+_NOT_PER_BAR = {"strikes"}
+
+
+class ParameterSpace:
+    def __init__(self, strategy_parameters: dict[str, tuple[int, int]]):
+        """`strategy_parameters` as on `StrategyTester` - name -> (low, high), both inclusive"""
+        self.names = list(strategy_parameters)
+        self.low = np.array([low for low, _ in strategy_parameters.values()])
+        self.high = np.array([high for _, high in strategy_parameters.values()])
+
+    @property
+    def size(self) -> int:
+        return math.prod(int(n) for n in self.high - self.low + 1)
+
+    def grid(self) -> Iterator[tuple]:
+        """Every combination, generated as it's consumed"""
+        return product(
+            *(range(low, high + 1) for low, high in zip(self.low, self.high))
+        )
+
+    def random(self, samples: int, seed: Optional[int] = None) -> list[tuple]:
+        rng = np.random.default_rng(seed)
+        return self._unique(
+            rng.integers(self.low, self.high + 1, size=(samples, len(self.names)))
+        )
+
+    def latin_hypercube(self, samples: int, seed: Optional[int] = None) -> list[tuple]:
+        """Each parameter's range is cut into `samples` strata and every stratum gets used once"""
+        rng = np.random.default_rng(seed)
+        strata = np.column_stack(
+            [rng.permutation(samples) for _ in self.names]
+        ) + rng.random((samples, len(self.names)))
+        span = self.high - self.low + 1
+        return self._unique(self.low + np.floor(strata / samples * span).astype(int))
+
+    def sample(
+        self, samples: Optional[int], method: str = "lhs", seed: Optional[int] = None
+    ) -> Iterable[tuple]:
+        if method not in SAMPLING_METHODS:
+            raise ValueError(
+                f"Unknown sampling method '{method}' - use one of {SAMPLING_METHODS}"
+            )
+        if method == "grid" or samples is None or samples >= self.size:
+            return self.grid()
+        if method == "random":
+            return self.random(samples, seed)
+        return self.latin_hypercube(samples, seed)
+
+    @staticmethod
+    def _unique(rows: np.ndarray) -> list[tuple]:
+        # Small ranges can collide - keep the first of each, in sample order
+        return list(dict.fromkeys(tuple(int(v) for v in row) for row in rows))
+
+
+@dataclass
+class Candidate:
+    params: dict
+    score: float
+    output: object  # the TestOutput of its last (longest) run
+    bars: int  # how much history that run covered
+
+
+def score(output) -> float:
+    """Net P&L of a `TestOutput`"""
+    return float(output.profit + output.loss)
+
+
+def window(history: dict, bars: int) -> dict:
+    """The first `bars` rows of a stock/options history (per-strike columns are left alone)"""
+    return {
+        key: value[:bars]
+        if isinstance(value, np.ndarray) and value.ndim and key not in _NOT_PER_BAR
+        else value
+        for key, value in history.items()
+    }
+
+
+def rung_windows(
+    candidates: int, total_bars: int, eta: int, min_bars: int
+) -> list[int]:
+    """History length for each rung, shortest first - the last one is always everything"""
+    rungs = math.ceil(math.log(candidates, eta)) if candidates > 1 else 0
+    # Don't go below min_bars, a strategy needs the warm-up before its signals mean anything
+    while rungs and total_bars // eta**rungs < min_bars:
+        rungs -= 1
+    return [total_bars // eta**k for k in range(rungs, 0, -1)] + [total_bars]
+
+
+def successive_halving(
+    back_test: Callable,
+    strategy_type: type,
+    param_names: list[str],
+    candidates: Iterable[tuple],
+    options_history: dict,
+    stock_history: dict,
+    eta: int = ETA,
+    min_bars: int = MIN_WINDOW_BARS,
+    workers: Optional[int] = 1,
+    chunk_size: int = 256,
+) -> list[Candidate]:
+    """The candidates that made it to the full history, best first"""
+    survivors = list(candidates)
+    total_bars = len(stock_history.get("t", ()))
+    results: list[Candidate] = []
+    windows = rung_windows(len(survivors), total_bars, eta, min_bars)
+    evaluated = 0
+    for rung, bars in enumerate(windows):
+        options, stock = window(options_history, bars), window(stock_history, bars)
+        if workers == 1:
+            outputs = (
+                (
+                    combination,
+                    back_test(
+                        strategy_type([], **dict(zip(param_names, combination))),
+                        options,
+                        stock,
+                    ),
+                )
+                for combination in survivors
+            )
+        else:
+            outputs = run_parallel(
+                back_test,
+                strategy_type,
+                param_names,
+                survivors,
+                options,
+                stock,
+                workers=workers,
+                chunk_size=chunk_size,
+                with_params=True,
+            )
+        results = sorted(
+            (
+                Candidate(
+                    dict(zip(param_names, combination)), score(output), output, bars
+                )
+                for combination, output in outputs
+            ),
+            key=lambda c: c.score,
+            reverse=True,
+        )
+        if not results:
+            break
+        evaluated += len(results) * bars
+        logger.info(
+            f"Rung {rung + 1}/{len(windows)}: {len(results)} candidates on {bars} bars,"
+            f" best {results[0].score:.2f}"
+        )
+        if rung < len(windows) - 1:
+            keep = max(1, math.ceil(len(results) / eta))
+            survivors = [tuple(c.params.values()) for c in results[:keep]]
+
+    logger.info(
+        f"Successive halving done - {evaluated} strategy-bars evaluated"
+        f" ({evaluated / max(1, total_bars):.0f} full history runs' worth)"
+    )
+    return results
@@ -0,0 +1,168 @@
+"""
+Process-pool execution for `BackTester.run` parameter sweeps.
+
+The stock/option history gets published ONCE before the pool spins up:
+- NumPy arrays are written to a tmpfs-backed folder (`/dev/shm` when available)
+  and every worker memory-maps them read-only, so there's a single physical copy
+  no matter how many workers we run.
+- Anything else in the history (plain dicts, lists...) is handed to each worker
+  once through the pool initializer rather than once per variation.
+
+After that the only payload per task is a chunk of parameter combinations.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from loguru import logger
+
+# Per-worker state, set once by `_init_worker`
+_worker_state: dict = {}
+
+
+class SharedHistory:
+    """Publishes a set of histories so worker processes can attach without copying"""
+
+    def __init__(self, histories: dict[str, dict]):
+        shm_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.folder = tempfile.mkdtemp(prefix="rh_backtest_", dir=shm_root)
+        # name -> {key: ("array", path) | ("value", obj)}
+        self.spec: dict[str, dict] = {}
+        for name, history in histories.items():
+            self.spec[name] = {}
+            for key, value in history.items():
+                if isinstance(value, np.ndarray):
+                    path = os.path.join(self.folder, f"{name}.{key}.npy")
+                    np.save(path, value)
+                    self.spec[name][key] = ("array", path)
+                else:
+                    self.spec[name][key] = ("value", value)
+
+    def close(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def __enter__(self) -> "SharedHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_history(spec: dict[str, dict]) -> dict[str, dict]:
+    """Rebuilds the histories published by `SharedHistory` (arrays are read-only memmaps)"""
+    histories = {}
+    for name, entries in spec.items():
+        histories[name] = {
+            key: np.load(payload, mmap_mode="r") if kind == "array" else payload
+            for key, (kind, payload) in entries.items()
+        }
+    return histories
+
+
+@dataclass
+class SweepReport:
+    variations: int
+    workers: int
+    wall_clock: float
+
+    @property
+    def throughput(self) -> float:
+        """Variations tested per second"""
+        return self.variations / self.wall_clock if self.wall_clock else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.variations} variations in {self.wall_clock:.2f}s on "
+            f"{self.workers} worker(s) -> {self.throughput:.1f} variations/sec"
+        )
+
+
+def _init_worker(
+    spec: dict[str, dict],
+    strategy_type: type,
+    param_names: list[str],
+    back_test: Callable,
+) -> None:
+    _worker_state["histories"] = attach_history(spec)
+    _worker_state["strategy_type"] = strategy_type
+    _worker_state["param_names"] = param_names
+    _worker_state["back_test"] = back_test
+
+
+def _run_chunk(combinations: list[tuple]) -> list:
+    histories = _worker_state["histories"]
+    strategy_type = _worker_state["strategy_type"]
+    param_names = _worker_state["param_names"]
+    back_test = _worker_state["back_test"]
+    return [
+        back_test(
+            strategy_type([], **dict(zip(param_names, combination))),
+            histories["options"],
+            histories["stock"],
+        )
+        for combination in combinations
+    ]
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def run_parallel(
+    back_test: Callable,
+    strategy_type: type,
+    param_names: list[str],
+    combinations: Iterable[tuple],
+    options_history: dict,
+    stock_history: dict,
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+    report: Optional[list] = None,
+    with_params: bool = False,
+) -> Iterator:
+    """
+    Fans the parameter combinations out over a process pool and yields each
+    `TestOutput` as soon as its chunk is done (completion order, not input order).
+    - workers: defaults to every core on the box
+    - chunk_size: combinations per task, big enough to amortize the IPC round trip
+    - report: if a list is passed, the `SweepReport` gets appended to it once the sweep is done
+    - with_params: yield (combination, TestOutput) pairs instead
+    """
+    workers = workers or os.cpu_count() or 1
+    # Keep at most a few chunks per worker in flight so we never materialize the full sweep
+    max_in_flight = workers * 4
+    started = time.perf_counter()
+    tested = 0
+    with SharedHistory({"options": options_history, "stock": stock_history}) as shared:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.spec, strategy_type, param_names, back_test),
+        ) as pool:
+            chunks = _chunked(combinations, chunk_size)
+            # future -> the combinations it's testing
+            pending = {
+                pool.submit(_run_chunk, c): c for c in islice(chunks, max_in_flight)
+            }
+            while pending:
+                done = next(as_completed(pending))
+                chunk = pending.pop(done)
+                if next_chunk := next(chunks, None):
+                    pending[pool.submit(_run_chunk, next_chunk)] = next_chunk
+                outputs = done.result()
+                tested += len(outputs)
+                yield from zip(chunk, outputs) if with_params else outputs
+
+    sweep = SweepReport(tested, workers, time.perf_counter() - started)
+    logger.info(f"Back test sweep done - {sweep}")
+    if report is not None:
+        report.append(sweep)
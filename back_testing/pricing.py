@@ -0,0 +1,351 @@
+"""
+Black-Scholes on whole NumPy arrays, for backtesting options we don't have price history for.
+
+Everything broadcasts: a (bars, 1) column of underlying prices against a (strikes,) ladder
+prices every contract at every bar in one go.
+- `black_scholes` / `black_scholes_greeks`: prices and greeks (Robinhood's units - theta per day,
+  vega and rho per 1 point)
+- `implied_volatility`: Newton steps, falling back to bisection whenever a step leaves the bracket
+- `synthesize_option_history`: weekly calls/puts over each week's strike ladder, priced off the minute
+  candles with a trailing realized vol
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+RISK_FREE_RATE = 0.045
+SECONDS_PER_YEAR = 365 * 86_400
+MINUTES_PER_YEAR = 252 * 390  # trading minutes, for annualizing minute returns
+VOL_WINDOW = 390  # a session of minute bars
+DEFAULT_VOLATILITY = 0.30  # until there's enough history for realized vol
+MIN_VOLATILITY = 0.05
+MAX_VOLATILITY = 3.0
+# A contract's last minute is still worth its intrinsic value, not 0/0
+MIN_TIME_TO_EXPIRY = 60 / SECONDS_PER_YEAR
+# Weekly options expire Friday at the 4pm ET close. 20:00 UTC is the close during
+# daylight time (an hour late in winter), plenty close for minute bars
+EXPIRY_HOUR_UTC = 20
+STRIKE_COUNT = 21
+STRIKE_WIDTH = 0.20  # ladder covers +/- 20% around the price
+
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+_HART_CUTOFF = 7.07106781186547
+_HART_NUMERATOR = [
+    3.52624965998911e-02,
+    0.700383064443688,
+    6.37396220353165,
+    33.912866078383,
+    112.079291497871,
+    221.213596169931,
+    220.206867912376,
+]
+_HART_DENOMINATOR = [
+    8.83883476483184e-02,
+    1.75566716318264,
+    16.064177579207,
+    86.7807322029461,
+    296.564248779674,
+    637.333633378831,
+    793.826512519948,
+    440.413735824752,
+]
+
+
+def norm_cdf(x) -> np.ndarray:
+    # Hart's 5666 rational approximation (as in West, "Better approximations to cumulative
+    # normal functions"), double precision - numpy has no erf and scipy isn't a dependency
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x)
+    inner = np.polyval(_HART_NUMERATOR, z) / np.polyval(_HART_DENOMINATOR, z)
+    # Continued fraction out in the tails
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = z + 0.65
+        for k in (4, 3, 2, 1):
+            fraction = z + k / fraction
+    density = np.exp(-0.5 * z * z)
+    tail = np.where(z < _HART_CUTOFF, density * inner, density / fraction / _SQRT_2PI)
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def norm_pdf(x) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+@dataclass
+class OptionGreeks:
+    price: np.ndarray
+    delta: np.ndarray
+    gamma: np.ndarray
+    theta: np.ndarray  # per calendar day
+    vega: np.ndarray  # per 1 vol point (0.01)
+    rho: np.ndarray  # per 1 rate point (0.01)
+
+
+def _d1_d2(spot, strike, years, sigma, r, q):
+    years = np.maximum(years, MIN_TIME_TO_EXPIRY)
+    sigma_sqrt_t = sigma * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (r - q + 0.5 * sigma * sigma) * years) / sigma_sqrt_t
+    return d1, d1 - sigma_sqrt_t, years
+
+
+def black_scholes(
+    spot,
+    strike,
+    years,
+    sigma,
+    is_call=True,
+    r: float = RISK_FREE_RATE,
+    q: float = 0.0,
+) -> np.ndarray:
+    """Option prices, `years` to expiry. Every argument can be a scalar or an array."""
+    spot, strike, sigma = (
+        np.asarray(a, dtype=np.float64) for a in (spot, strike, sigma)
+    )
+    d1, d2, years = _d1_d2(spot, strike, years, sigma, r, q)
+    discounted_spot = spot * np.exp(-q * years)
+    discounted_strike = strike * np.exp(-r * years)
+    call = discounted_spot * norm_cdf(d1) - discounted_strike * norm_cdf(d2)
+    # Put-call parity instead of a second pair of cdfs
+    return np.where(is_call, call, call - discounted_spot + discounted_strike)
+
+
+def black_scholes_greeks(
+    spot,
+    strike,
+    years,
+    sigma,
+    is_call=True,
+    r: float = RISK_FREE_RATE,
+    q: float = 0.0,
+) -> OptionGreeks:
+    spot, strike, sigma = (
+        np.asarray(a, dtype=np.float64) for a in (spot, strike, sigma)
+    )
+    d1, d2, years = _d1_d2(spot, strike, years, sigma, r, q)
+    spot_decay = np.exp(-q * years)
+    strike_decay = np.exp(-r * years)
+    cdf_d1, cdf_d2, pdf_d1 = norm_cdf(d1), norm_cdf(d2), norm_pdf(d1)
+    sqrt_t = np.sqrt(years)
+
+    call = spot * spot_decay * cdf_d1 - strike * strike_decay * cdf_d2
+    put = call - spot * spot_decay + strike * strike_decay
+    # Theta terms shared by calls and puts, then the part that depends on the side
+    time_decay = -spot * spot_decay * pdf_d1 * sigma / (2 * sqrt_t)
+    call_theta = (
+        time_decay + q * spot * spot_decay * cdf_d1 - r * strike * strike_decay * cdf_d2
+    )
+    put_theta = (
+        time_decay
+        - q * spot * spot_decay * (1 - cdf_d1)
+        + r * strike * strike_decay * (1 - cdf_d2)
+    )
+    call_rho = strike * years * strike_decay * cdf_d2
+    put_rho = -strike * years * strike_decay * (1 - cdf_d2)
+
+    return OptionGreeks(
+        price=np.where(is_call, call, put),
+        delta=np.where(is_call, spot_decay * cdf_d1, spot_decay * (cdf_d1 - 1)),
+        gamma=spot_decay * pdf_d1 / (spot * sigma * sqrt_t),
+        theta=np.where(is_call, call_theta, put_theta) / 365,
+        vega=spot * spot_decay * pdf_d1 * sqrt_t / 100,
+        rho=np.where(is_call, call_rho, put_rho) / 100,
+    )
+
+
+def implied_volatility(
+    price,
+    spot,
+    strike,
+    years,
+    is_call=True,
+    r: float = RISK_FREE_RATE,
+    q: float = 0.0,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100,
+) -> np.ndarray:
+    """Vol that reproduces each price (to within `tolerance` of vol) - NaN where the price is outside no-arbitrage bounds or it didn't converge"""
+    price, spot, strike, years, is_call = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (price, spot, strike, years)),
+        np.asarray(is_call, dtype=bool),
+    )
+    years = np.maximum(years, MIN_TIME_TO_EXPIRY)
+    discounted_spot = spot * np.exp(-q * years)
+    discounted_strike = strike * np.exp(-r * years)
+    lower_bound = np.where(
+        is_call,
+        np.maximum(discounted_spot - discounted_strike, 0),
+        np.maximum(discounted_strike - discounted_spot, 0),
+    )
+    upper_bound = np.where(is_call, discounted_spot, discounted_strike)
+    valid = (price > lower_bound) & (price < upper_bound)
+
+    lo = np.full(price.shape, 1e-4)
+    hi = np.full(price.shape, 10.0)
+    # Brenner-Subrahmanyam for the first guess, it's close for anything near the money
+    sigma = np.clip(
+        np.sqrt(2 * np.pi / years) * price / spot, MIN_VOLATILITY, MAX_VOLATILITY
+    )
+    converged = np.zeros(price.shape, dtype=bool)
+    # Only the contracts that haven't converged yet get priced again
+    active = np.flatnonzero(valid)
+    price, spot, strike, years, is_call = (
+        a.ravel() for a in (price, spot, strike, years, is_call)
+    )
+    sigma, lo, hi, converged = (a.reshape(-1) for a in (sigma, lo, hi, converged))
+    for _ in range(max_iterations):
+        if not active.size:
+            break
+        current, target = sigma[active], price[active]
+        greeks = black_scholes_greeks(
+            spot[active], strike[active], years[active], current, is_call[active], r, q
+        )
+        diff = greeks.price - target
+        below = np.where(diff > 0, current, hi[active])
+        above = np.where(diff < 0, current, lo[active])
+        vega = greeks.vega * 100
+        # Done once the next Newton step (or the bracket) is smaller than `tolerance` in vol terms,
+        # a price tolerance means nothing for deep ITM/OTM contracts that barely move with vol
+        done = (np.abs(diff) <= tolerance * vega) | (below - above < tolerance)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = current - diff / vega
+        in_bracket = (newton > above) & (newton < below)
+        sigma[active] = np.where(
+            done, current, np.where(in_bracket, newton, 0.5 * (above + below))
+        )
+        hi[active], lo[active] = below, above
+        converged[active[done]] = True
+        active = active[~done]
+    return np.where(converged, sigma, np.nan).reshape(valid.shape)
+
+
+def realized_volatility(closes, window: int = VOL_WINDOW) -> np.ndarray:
+    """Annualized trailing vol of minute log returns, one value per bar"""
+    closes = np.asarray(closes, dtype=np.float64)
+    squared = np.zeros(len(closes))
+    squared[1:] = np.diff(np.log(closes)) ** 2
+    totals = np.cumsum(squared)
+    counts = np.minimum(np.arange(len(closes)), window)
+    window_totals = totals.copy()
+    window_totals[window:] -= totals[:-window]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol = np.sqrt(window_totals / counts * MINUTES_PER_YEAR)
+    # Not enough returns yet -> default, and keep it inside sane bounds either way
+    vol = np.where(counts >= min(window, 30), vol, DEFAULT_VOLATILITY)
+    return np.clip(vol, MIN_VOLATILITY, MAX_VOLATILITY)
+
+
+def weekly_expiries(t_seconds) -> np.ndarray:
+    """Epoch seconds of the Friday close each bar's weekly contract expires at"""
+    t_seconds = np.asarray(t_seconds, dtype=np.int64)
+    days = t_seconds // 86_400
+    # 1970-01-01 was a Thursday, so (days + 3) % 7 is 0 on Mondays and 4 on Fridays
+    friday = days + (4 - (days + 3) % 7)
+    expiry = friday * 86_400 + EXPIRY_HOUR_UTC * 3600
+    # Past the close on Friday (or on the weekend) rolls to next week's
+    return np.where(expiry <= t_seconds, expiry + 7 * 86_400, expiry)
+
+
+def strike_step(price: float) -> float:
+    if price < 25:
+        return 0.5
+    if price < 200:
+        return 2.5
+    return 5.0
+
+
+def strike_ladder(
+    price: float, count: int = STRIKE_COUNT, width: float = STRIKE_WIDTH
+) -> np.ndarray:
+    """`count` strikes centered on `price`, on the increments the chain would use"""
+    step = strike_step(price)
+    strikes = np.linspace(price * (1 - width), price * (1 + width), count)
+    return np.unique(np.round(strikes / step) * step)
+
+
+def _closest(ladder: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """The strike of a sorted ladder closest to each price (the lower one on a tie)"""
+    if len(ladder) == 1:
+        return np.full(len(prices), ladder[0])
+    i = np.clip(np.searchsorted(ladder, prices), 1, len(ladder) - 1)
+    lower, upper = ladder[i - 1], ladder[i]
+    return np.where(prices - lower <= upper - prices, lower, upper)
+
+
+def weekly_ladders(
+    closes: np.ndarray,
+    expiry: np.ndarray,
+    count: int = STRIKE_COUNT,
+    width: float = STRIKE_WIDTH,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Every strike listed over the history + the index of the at-the-money one at each bar.
+    Each weekly contract gets its own ladder centered on the close of the first bar it trades
+    at (its listing), so no later price is used. The at-the-money strike is the one of that
+    week's ladder closest to the close: within half the ladder spacing (strikes are ~2 * width /
+    (count - 1) = 2% apart by default, rounded to the strike step) as long as the stock stays
+    within `width` of its listing close - past that it's stuck on the edge strike until the
+    next week's ladder is listed.
+    """
+    starts = np.flatnonzero(np.r_[True, expiry[1:] != expiry[:-1]])
+    ladders = [strike_ladder(float(closes[start]), count, width) for start in starts]
+    strikes = np.unique(np.concatenate(ladders))
+    atm = np.empty(len(closes), dtype=np.int64)
+    for start, end, ladder in zip(starts, np.r_[starts[1:], len(closes)], ladders):
+        atm[start:end] = np.searchsorted(strikes, _closest(ladder, closes[start:end]))
+    return strikes, atm
+
+
+def synthesize_option_history(
+    stock_history: dict,
+    strikes=None,
+    r: float = RISK_FREE_RATE,
+    vol_window: int = VOL_WINDOW,
+    with_greeks: bool = False,
+) -> dict:
+    """
+    Weekly call and put prices at every minute bar of `stock_history` (CandleStore columns, `t` in ms).
+    Without `strikes` every week gets its own ladder, see `weekly_ladders`.
+    Returns columns: t, strikes, atm (index of the at-the-money strike at each bar), expiry (epoch s),
+    iv, and call/put as (bars, strikes) arrays -
+    plus call_delta/put_delta/gamma/vega/call_theta/put_theta/call_rho/put_rho with `with_greeks`.
+    """
+    t = np.asarray(stock_history.get("t", ()), dtype=np.int64)
+    if not len(t):
+        return {}
+    closes = np.asarray(stock_history["c"], dtype=np.float64)
+    t_seconds = t // 1000
+    expiry = weekly_expiries(t_seconds)
+    if strikes is None:
+        strikes, atm = weekly_ladders(closes, expiry)
+    else:
+        strikes = np.unique(np.asarray(strikes, np.float64))
+        atm = np.searchsorted(strikes, _closest(strikes, closes))
+    years = np.maximum((expiry - t_seconds) / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRY)
+    years = years[:, None]
+    iv = realized_volatility(closes, vol_window)
+    spot, sigma = closes[:, None], iv[:, None]
+
+    history = {"t": t, "strikes": strikes, "atm": atm, "expiry": expiry, "iv": iv}
+    if not with_greeks:
+        call = black_scholes(spot, strikes, years, sigma, True, r)
+        history["call"] = call
+        history["put"] = call - spot + strikes * np.exp(-r * years)
+        return history
+
+    calls = black_scholes_greeks(spot, strikes, years, sigma, True, r)
+    puts = black_scholes_greeks(spot, strikes, years, sigma, False, r)
+    history.update(
+        call=calls.price,
+        put=puts.price,
+        call_delta=calls.delta,
+        put_delta=puts.delta,
+        gamma=calls.gamma,
+        vega=calls.vega,
+        call_theta=calls.theta,
+        put_theta=puts.theta,
+        call_rho=calls.rho,
+        put_rho=puts.rho,
+    )
+    return history
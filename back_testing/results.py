@@ -0,0 +1,200 @@
+"""
+Sweep results without keeping every `TestOutput` around:
+- `TopK`: bounded heap of the best K variations - the only ones whose trades stay in memory
+- `ResultStore`: one row of summary metrics per variation, appended to an on-disk columnar
+  store as the sweep runs and queryable afterwards
+
+Layout: <root>/<run>/<column>.bin (same raw little-endian columns as the CandleStore) + meta.json
+- One `param.<name>` column per strategy parameter, int64 or float64 (which one is in meta.json)
+- profit/loss/max_drawdown/net (float64) and trades/wins (int64)
+"""
+
+import heapq
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+DEFAULT_ROOT = Path(__file__).parent / "results"
+TOP_K = 20
+FLUSH_ROWS = 4096
+METRICS = {
+    "profit": np.dtype("<f8"),
+    "loss": np.dtype("<f8"),
+    "trades": np.dtype("<i8"),
+    "wins": np.dtype("<i8"),
+    "max_drawdown": np.dtype("<f8"),
+    # Written last, so its length is the number of complete rows
+    "net": np.dtype("<f8"),
+}
+PARAM_DTYPES = {int: np.dtype("<i8"), float: np.dtype("<f8")}
+
+
+class TopK:
+    """The K items with the highest `key` seen so far - O(log K) per push, O(K) memory"""
+
+    def __init__(self, k: int = TOP_K, key: Callable[[Any], float] = lambda x: x):
+        self.k = k
+        self.key = key
+        # Min-heap of (key, -sequence, item), the worst item we're keeping on top
+        self._heap: list[tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+
+    def push(self, item: Any) -> None:
+        # Ties go to whichever came first
+        entry = (self.key(item), -next(self._sequence), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> list:
+        """Best first"""
+        return [
+            item for *_, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)
+        ]
+
+
+def summarize(output) -> dict[str, float | int]:
+    """The metrics a `TestOutput` gets stored as"""
+    trades = output.trades
+    return {
+        "profit": float(output.profit),
+        "loss": float(output.loss),
+        "trades": len(trades),
+        "wins": trades.wins,
+        "max_drawdown": trades.max_drawdown,
+        "net": float(output.profit + output.loss),
+    }
+
+
+def param_type(low, high) -> type:
+    """int unless either end of a parameter's range is a float"""
+    return float if isinstance(low, float) or isinstance(high, float) else int
+
+
+@dataclass
+class ResultWriter:
+    folder: Path
+    param_names: list[str]
+    param_dtypes: list[np.dtype]
+    _buffer: list[tuple] = field(default_factory=list)
+
+    def append(self, combination: tuple, output) -> None:
+        for name, dtype, value in zip(self.param_names, self.param_dtypes, combination):
+            # An int column would silently truncate it and the stored run couldn't be reproduced
+            if dtype.kind == "i" and value != int(value):
+                raise ValueError(
+                    f"Parameter '{name}' = {value} isn't an integer - create the run with"
+                    f" param_types={{'{name}': float}}"
+                )
+        metrics = summarize(output)
+        self._buffer.append((*combination, *(metrics[name] for name in METRICS)))
+        if len(self._buffer) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        self._buffer.clear()
+        names = [f"param.{name}" for name in self.param_names] + list(METRICS)
+        dtypes = self.param_dtypes + list(METRICS.values())
+        # `net` is the last column, so a crash mid-flush never exposes a partial row
+        for name, dtype, values in zip(names, dtypes, columns):
+            with open(self.folder / f"{name}.bin", "ab") as f:
+                f.write(np.asarray(values, dtype=dtype).tobytes())
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ResultStore:
+    def __init__(self, root: str | Path = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def runs(self) -> list[str]:
+        """Every stored run, oldest first"""
+        if not self.root.is_dir():
+            return []
+        return sorted(d.name for d in self.root.iterdir() if (d / "meta.json").exists())
+
+    def create(
+        self,
+        param_names: list[str],
+        name: Optional[str] = None,
+        param_types: Optional[dict[str, type]] = None,
+        **metadata,
+    ) -> ResultWriter:
+        """
+        A new run - `metadata` (ticker, dates...) is kept in its meta.json
+        - param_types: int or float per parameter, int if left out (see `param_type`)
+        """
+        name = name or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        dtypes = [PARAM_DTYPES[(param_types or {}).get(p, int)] for p in param_names]
+        folder = self.root / name
+        folder.mkdir(parents=True, exist_ok=False)
+        meta = {
+            "param_names": param_names,
+            "param_dtypes": [dtype.str for dtype in dtypes],
+            **metadata,
+        }
+        with open(folder / "meta.json", "w") as f:
+            json.dump(meta, f, default=str, indent=2)
+        return ResultWriter(folder, param_names, dtypes)
+
+    def meta(self, name: str) -> dict:
+        with open(self.root / name / "meta.json") as f:
+            return json.load(f)
+
+    def read(self, name: str) -> dict[str, np.ndarray]:
+        """Zero-copy, read-only memmaps of every column (params without the `param.` prefix)"""
+        folder = self.root / name
+        meta = self.meta(name)
+        param_names = meta["param_names"]
+        # Runs stored before dtypes were recorded only had int64 params
+        param_dtypes = meta.get("param_dtypes", ["<i8"] * len(param_names))
+        net_path = folder / "net.bin"
+        rows = (
+            os.path.getsize(net_path) // METRICS["net"].itemsize
+            if net_path.exists()
+            else 0
+        )
+        dtypes = {
+            f"param.{p}": np.dtype(dtype) for p, dtype in zip(param_names, param_dtypes)
+        } | METRICS
+        columns = {}
+        for column, dtype in dtypes.items():
+            path = folder / f"{column}.bin"
+            if rows and not path.exists():
+                continue  # a metric added after this run was stored
+            values = (
+                np.memmap(path, dtype=dtype, mode="r")[:rows]
+                if rows
+                else np.empty(0, dtype)
+            )
+            columns[column.removeprefix("param.")] = values
+        return columns
+
+    def top(self, name: str, n: int = 10, by: str = "net") -> list[dict]:
+        """The best `n` rows of a run by any column, as dicts"""
+        columns = self.read(name)
+        order = np.argsort(-columns[by], kind="stable")[:n]
+        return [
+            {column: values[i].item() for column, values in columns.items()}
+            for i in order
+        ]
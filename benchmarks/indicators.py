@@ -0,0 +1,116 @@
+"""
+Streaming vs batch indicators over a full day of 1-minute ticks (9:30 -> 16:00 = 390 ticks).
+- Checks the streaming indicators match the batch formulas at every tick
+- Times one tick early in the session vs late in the session
+Run from the repo root: `python -m benchmarks.indicators`
+"""
+
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loguru import logger  # noqa: E402
+
+from trading_strategies.indicators import EMA, RollingSMA, WilderRSI  # noqa: E402
+
+TICKS_PER_DAY = 390
+
+
+# Batch reference formulas - a full rescan of the data per tick, which is what
+# `MovingAverageStrategy` used to do on every should_buy/should_sell call
+def batch_sma(data: list, period: int) -> float:
+    if len(data) < period:
+        return sum(data) / len(data)
+    return sum(data[-period:]) / period
+
+
+def batch_ema(data: list, period: int) -> float:
+    value = sum(data[:period]) / len(data[:period])
+    alpha = 2 / (period + 1)
+    for price in data[period:]:
+        value += alpha * (price - value)
+    return value
+
+
+def batch_rsi(data: list, period: int) -> float:
+    deltas = [data[i] - data[i - 1] for i in range(1, len(data))]
+    gains = [d if d > 0 else 0.0 for d in deltas]
+    losses = [-d if d < 0 else 0.0 for d in deltas]
+    seed = min(period, len(deltas))
+    avg_gain = sum(gains[:seed]) / seed if seed else 0.0
+    avg_loss = sum(losses[:seed]) / seed if seed else 0.0
+    for gain, loss in zip(gains[seed:], losses[seed:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    if avg_loss == 0:
+        return 100
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def synthetic_day(seed: int = 7, start: float = 225.0) -> list[float]:
+    rng = random.Random(seed)
+    prices = [start]
+    for _ in range(TICKS_PER_DAY - 1):
+        prices.append(max(0.01, prices[-1] + rng.gauss(0, 0.15)))
+    return prices
+
+
+def check_consistency(prices: list[float], period: int = 14, tol: float = 1e-9) -> None:
+    sma, ema, rsi = RollingSMA(period), EMA(period), WilderRSI(period)
+    for i, price in enumerate(prices, start=1):
+        window = prices[:i]
+        for name, streaming, batch in (
+            ("SMA", sma.update(price), batch_sma(window, period)),
+            ("EMA", ema.update(price), batch_ema(window, period)),
+            ("RSI", rsi.update(price), batch_rsi(window, period)),
+        ):
+            assert abs(streaming - batch) <= tol * max(1.0, abs(batch)), (
+                f"{name}({period}) drifted at tick {i}: {streaming} != {batch}"
+            )
+
+
+def time_ticks(prices: list[float], tick_range: range, repeat: int = 200) -> dict:
+    from trading_strategies.moving_averages import MovingAverageStrategy
+
+    streaming, batch = 0.0, 0.0
+    for _ in range(repeat):
+        strat = MovingAverageStrategy(prices[: tick_range.start], 70, 14, 10, 50)
+        started = time.perf_counter()
+        for i in tick_range:
+            strat.update(prices[i])
+            strat.should_buy()
+        streaming += time.perf_counter() - started
+
+        started = time.perf_counter()
+        for i in tick_range:
+            window = prices[: i + 1]
+            batch_sma(window, 10), batch_sma(window, 50), batch_rsi(window, 14)
+        batch += time.perf_counter() - started
+    ticks = len(tick_range) * repeat
+    return {"streaming_us": streaming / ticks * 1e6, "batch_us": batch / ticks * 1e6}
+
+
+def main() -> dict:
+    logger.remove()  # per-tick logging would drown out what we're measuring
+    prices = synthetic_day()
+    for period in (1, 5, 14, 50):
+        check_consistency(prices, period)
+
+    results = {
+        "open_9_31": time_ticks(prices, range(1, 31)),
+        "close_3_59": time_ticks(prices, range(TICKS_PER_DAY - 30, TICKS_PER_DAY)),
+    }
+    for label, timing in results.items():
+        print(
+            f"{label}: streaming {timing['streaming_us']:.2f}us/tick"
+            f" | batch {timing['batch_us']:.2f}us/tick"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
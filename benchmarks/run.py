@@ -0,0 +1,111 @@
+"""
+Runs the benchmark suite, writes the results as JSON and compares them to a saved baseline.
+
+    python -m benchmarks.run                      # everything
+    python -m benchmarks.run contract_selection   # just some of them
+    python -m benchmarks.run --save-baseline      # accept the current numbers as the new baseline
+
+Exits with 1 if any metric regressed by more than --tolerance against the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import traceback
+from datetime import datetime, timezone
+
+from benchmarks.suite import BENCHMARKS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names: list[str]) -> dict:
+    results = {}
+    for name in names:
+        print(f"-> {name}", flush=True)
+        try:
+            results[name] = BENCHMARKS[name]()
+        except Exception as e:
+            traceback.print_exc()
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions, empty if there are none"""
+    regressions = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(name, {}).get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            if metric.endswith("_per_sec"):
+                regressed = value < old * (1 - tolerance)
+            else:
+                regressed = value > old * (1 + tolerance)
+            if regressed:
+                regressions.append(f"{name}.{metric}: {old:.6g} -> {value:.6g}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("names", nargs="*", help=f"any of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    current = run(args.names or list(BENCHMARKS))
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(json.dumps(current["results"], indent=2))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline -> {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet - run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if regressions := compare(current, baseline, args.tolerance):
+        print(f"Regressions (> {args.tolerance:.0%}):\n  " + "\n  ".join(regressions))
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
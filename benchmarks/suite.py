@@ -0,0 +1,558 @@
+"""
+The benchmarks themselves - each one returns a flat dict of metrics.
+Metric naming drives the baseline comparison in `run.py`:
+- `*_per_sec` -> higher is better
+- anything else (seconds, microseconds, API calls) -> lower is better
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from broker import SimulatedBroker, using_broker  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def timed(func, repeat: int = 5) -> dict:
+    """Best-of/median-of `repeat` runs, in seconds"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - started)
+    return {"min_s": min(runs), "median_s": statistics.median(runs)}
+
+
+def simulated_broker(**kwargs) -> SimulatedBroker:
+    return SimulatedBroker(prices={"AAPL": 225.0}, **kwargs)
+
+
+def fresh_interpreter(code: str, repeat: int = 5) -> float:
+    """Median wall clock of `code` in a new interpreter, minus the interpreter's own startup"""
+
+    def run(source: str) -> float:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", source], cwd=ROOT, check=True)
+        return time.perf_counter() - started
+
+    return statistics.median(run(code) - run("pass") for _ in range(repeat))
+
+
+@benchmark
+def startup() -> dict:
+    """What every worker restart pays before it can trade"""
+    return {
+        "import_package_s": fresh_interpreter("import trading_strategies"),
+        "build_strategy_s": fresh_interpreter(
+            "from trading_strategies import get_strategy; "
+            "get_strategy('MovingAverageStrategy')([], 70, 14, 10, 50)"
+        ),
+        "import_live_strategy_s": fresh_interpreter(
+            "from trading_strategies import get_strategy; "
+            "get_strategy('trade_strangle_without_kelly')"
+        ),
+    }
+
+
+@benchmark
+def contract_selection() -> dict:
+    """API calls + CPU time to pick contracts, cold vs warm strike ladder cache"""
+    import utils
+
+    results = {}
+    exp_date = utils.closest_friday()
+    scenarios = {
+        "closest_strike": lambda: utils.get_closest_strike_price(
+            "AAPL", "call", exp_date
+        ),
+        "otm_contract_details": lambda: (
+            utils.get_nearest_out_of_the_money_option_contract_details(
+                "AAPL", "put", exp_date
+            )
+        ),
+        "find_best_strikes": lambda: utils.find_best_strikes("AAPL", exp_date),
+    }
+    for name, scenario in scenarios.items():
+        with using_broker(simulated_broker()) as sim:
+            utils._strike_ladders.clear()
+            scenario()
+            results[f"{name}_cold_calls"] = sim.stats()["total_calls"]
+            sim.reset_stats()
+            scenario()
+            results[f"{name}_warm_calls"] = sim.stats()["total_calls"]
+            results[f"{name}_warm_s"] = timed(scenario, repeat=20)["median_s"]
+
+    # Cold strangle spin-up with a realistic 150ms per request
+    with using_broker(simulated_broker(latency={"default": 0.15})):
+        utils._strike_ladders.clear()
+        results["find_best_strikes_cold_150ms_latency_s"] = timed(
+            lambda: utils.find_best_strikes("AAPL", exp_date), repeat=1
+        )["min_s"]
+    return results
+
+
+@benchmark
+def identify_price_changes() -> dict:
+    with using_broker(simulated_broker()):
+        from trading_strategies.history_repeats_itself import (
+            identify_price_changes,
+            identify_price_changes_by_interval,
+        )
+
+        results = {}
+        for minutes in (5, 15, 60):
+            results[f"{minutes}min_s"] = timed(
+                lambda: identify_price_changes("AAPL", minutes)
+            )["median_s"]
+        results["all_intervals_s"] = timed(
+            lambda: identify_price_changes_by_interval("AAPL")
+        )["median_s"]
+    return results
+
+
+@benchmark
+def resample_candles() -> dict:
+    """A year of 1m candles into 5/10/15/30/60m bars, in one go and a minute at a time"""
+    from resample import Resampler, resample_many
+
+    candles = synthetic_candles(252)
+    candles["t"] = candles["t"] * 1000  # CandleStore keeps epoch ms
+    session = {column: values[:390] for column, values in candles.items()}
+
+    def stream_session():
+        resampler = Resampler(15)
+        for i in range(390):
+            resampler.update(
+                {column: values[i : i + 1] for column, values in session.items()}
+            )
+            resampler.bars
+
+    return {
+        "year_all_timeframes_s": timed(lambda: resample_many(candles), 3)["min_s"],
+        "streamed_minute_us": timed(stream_session, 3)["min_s"] / 390 * 1e6,
+    }
+
+
+@benchmark
+def numeric_core() -> dict:
+    """Chunked sums + mean/std over ~3 months of extended hours 5min candles"""
+    import numeric
+
+    rng = np.random.default_rng(0)
+    opens = 225 + np.cumsum(rng.normal(0, 0.2, 63 * 192)).round(2)
+    closes = (opens + rng.normal(0, 0.2, len(opens))).round(2)
+
+    def analysis():
+        chunks = numeric.chunked_sums(numeric.deltas(opens, closes), 3)
+        numeric.std_dev(chunks, numeric.mean(chunks))
+
+    results = {"float_s": timed(analysis, repeat=20)["median_s"]}
+    numeric.set_exact_math(True)
+    try:
+        results["exact_s"] = timed(analysis, repeat=3)["median_s"]
+    finally:
+        numeric.set_exact_math(False)
+    return results
+
+
+@benchmark
+def moving_average_indicators() -> dict:
+    from loguru import logger
+
+    from benchmarks import indicators
+
+    logger.remove()
+    prices = indicators.synthetic_day()
+    open_ticks = indicators.time_ticks(prices, range(1, 31), repeat=50)
+    close_ticks = indicators.time_ticks(
+        prices,
+        range(indicators.TICKS_PER_DAY - 30, indicators.TICKS_PER_DAY),
+        repeat=50,
+    )
+    return {
+        "tick_at_open_us": open_ticks["streaming_us"],
+        "tick_at_close_us": close_ticks["streaming_us"],
+    }
+
+
+def _sweep_tester():
+    from trading_strategies.moving_averages import MovingAverageStrategyTester
+
+    class BenchSweep(MovingAverageStrategyTester):
+        # A slice of the real ranges so a run takes seconds, not hours
+        @property
+        def strategy_parameters(self) -> dict:
+            return {
+                "rsi_threshold": (65, 70),
+                "rsi_period": (14, 15),
+                "short_ma_period": (5, 7),
+                "long_ma_period": (30, 32),
+            }
+
+    return BenchSweep()
+
+
+@benchmark
+def create_strategy_variations() -> dict:
+    from loguru import logger
+
+    from back_testing.back_tester import BackTester
+    from trading_strategies.moving_averages import MovingAverageStrategyTester
+
+    logger.remove()
+    tester = BackTester(MovingAverageStrategyTester(), "AAPL", None, None)
+    # It's a generator - consume it so the whole sweep gets built
+    timing = timed(
+        lambda: sum(1 for _ in tester.create_strategy_variations()), repeat=1
+    )
+    return {"full_sweep_s": timing["min_s"]}
+
+
+def synthetic_candles(days: int, seed: int = 0) -> dict:
+    """`days` sessions of 1m candles starting 2024-01-02 14:30 UTC"""
+    rng = np.random.default_rng(seed)
+    session_open = int(datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc).timestamp())
+    t = (session_open + np.arange(days)[:, None] * 86_400 + np.arange(390) * 60).ravel()
+    close = 225 * np.exp(np.cumsum(rng.normal(0, 0.0008, len(t))))
+    open_ = np.r_[close[0], close[:-1]]
+    return {
+        "t": t,
+        "o": open_,
+        "h": np.maximum(open_, close) * 1.0005,
+        "l": np.minimum(open_, close) * 0.9995,
+        "c": close,
+        "v": rng.integers(1_000, 50_000, len(t)).astype(np.float64),
+    }
+
+
+@benchmark
+def backtester_run() -> dict:
+    from loguru import logger
+
+    from back_testing.back_tester import BackTester
+    from data_visualization.candle_store import CandleStore
+
+    logger.remove()
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        store = CandleStore(folder)
+        store.append("AAPL", synthetic_candles(21))
+        for days in (1, 5, 21):
+            start = datetime(2024, 1, 2, tzinfo=timezone.utc)
+            end = datetime.fromtimestamp(
+                start.timestamp() + (days - 1) * 86_400, timezone.utc
+            )
+            tester = BackTester(_sweep_tester(), "AAPL", start, end, candle_store=store)
+            timing = timed(tester.run, repeat=1)
+            results[f"{days}d_s"] = timing["min_s"]
+            results[f"{days}d_variations_per_sec"] = tester.report.throughput
+    return results
+
+
+@benchmark
+def optimizer() -> dict:
+    """Successive halving vs the exhaustive sweep over the same grid, 5 sessions"""
+    from loguru import logger
+
+    from back_testing.back_tester import BackTester
+    from back_testing.optimizer import score
+    from data_visualization.candle_store import CandleStore
+
+    logger.remove()
+    with tempfile.TemporaryDirectory() as folder:
+        store = CandleStore(folder)
+        store.append("AAPL", synthetic_candles(5))
+        start = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        end = datetime(2024, 1, 8, tzinfo=timezone.utc)
+        tester = BackTester(_sweep_tester(), "AAPL", start, end, candle_store=store)
+        started = time.perf_counter()
+        exhaustive = max(score(output) for output in tester.iter_results())
+        exhaustive_s = time.perf_counter() - started
+        started = time.perf_counter()
+        best = tester.optimize(samples=None, method="grid")[0]
+        halving_s = time.perf_counter() - started
+    return {
+        "exhaustive_s": exhaustive_s,
+        "halving_s": halving_s,
+        "best_score_gap": exhaustive - best.score,
+    }
+
+
+@benchmark
+def sweep_results() -> dict:
+    """Peak memory of 48k fake variations (50 trades each): keep-everything vs top-K + ResultStore"""
+    import tracemalloc
+    from decimal import Decimal
+
+    from back_testing.back_tester import TestOutput
+    from back_testing.ledger import TradeLedger
+    from back_testing.results import ResultStore, TopK
+
+    when = int(datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp() * 1000)
+
+    def outputs(count: int):
+        rng = np.random.default_rng(0)
+        for i in range(count):
+            pnl = rng.normal(0, 1, 50).round(2)
+            trades = TradeLedger()
+            for p in pnl:
+                trades.append(when, when, 100.0, 100.0 + p)
+            profit = Decimal(str(pnl[pnl > 0].sum().round(2)))
+            loss = Decimal(str(pnl[pnl < 0].sum().round(2)))
+            yield (i, i % 7), TestOutput(profit, loss, trades)
+
+    def keep_everything(count: int):
+        results = [output for _, output in outputs(count)]
+        results.sort(key=lambda x: x.profit, reverse=True)
+
+    def top_k(count: int, folder: str):
+        top = TopK(20, key=lambda result: result[1].profit)
+        with ResultStore(folder).create(["a", "b"]) as writer:
+            for combination, output in outputs(count):
+                writer.append(combination, output)
+                top.push((combination, output))
+
+    def peak_mb(func) -> float:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / 1e6
+
+    with tempfile.TemporaryDirectory() as folder:
+        started = time.perf_counter()
+        top_k_peak = peak_mb(lambda: top_k(48_000, folder))
+        elapsed = time.perf_counter() - started
+    return {
+        "keep_everything_peak_mb": peak_mb(lambda: keep_everything(48_000)),
+        "top_k_peak_mb": top_k_peak,
+        "top_k_variations_per_sec": 48_000 / elapsed,
+    }
+
+
+@benchmark
+def option_pricing() -> dict:
+    """A year of minute bars over weekly 21 strike ladders, and the IV solver on 100k quotes"""
+    from back_testing.pricing import (
+        black_scholes,
+        implied_volatility,
+        synthesize_option_history,
+    )
+
+    candles = synthetic_candles(252)
+    candles["t"] = candles["t"] * 1000  # CandleStore keeps epoch ms
+    rng = np.random.default_rng(0)
+    spot = rng.uniform(50, 300, 100_000)
+    strike = spot * rng.uniform(0.8, 1.2, len(spot))
+    years = rng.uniform(1 / 365, 1, len(spot))
+    quotes = black_scholes(spot, strike, years, rng.uniform(0.1, 1.5, len(spot)))
+    with_greeks = lambda: synthesize_option_history(candles, with_greeks=True)  # noqa: E731
+    solve = lambda: implied_volatility(quotes, spot, strike, years)  # noqa: E731
+    return {
+        "year_prices_s": timed(lambda: synthesize_option_history(candles), 3)["min_s"],
+        "year_greeks_s": timed(with_greeks, 3)["min_s"],
+        "iv_100k_s": timed(solve, 3)["min_s"],
+    }
+
+
+@benchmark
+def strangle_scan() -> dict:
+    """200 tickers at 100ms per request, paced at 50 requests/sec"""
+    from loguru import logger
+
+    import utils
+    from trading_strategies.strangle_scanner import scan_strangles
+
+    logger.remove()
+    tickers = [f"T{i:03d}" for i in range(200)]
+    with using_broker(simulated_broker(latency={"default": 0.1})):
+        utils._strike_ladders.clear()
+        started = time.perf_counter()
+        candidates = scan_strangles(tickers, requests_per_second=50, time_budget=60)
+        elapsed = time.perf_counter() - started
+    return {"scan_s": elapsed, "tickers_per_sec": len(candidates) / elapsed}
+
+
+@benchmark
+def request_scheduler() -> dict:
+    """Latency of an exit/monitor request while a 300 request scan saturates the budget"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from broker import RequestScheduler, ScheduledBroker, r, request_priority
+    from models import RequestPriority
+
+    scheduler = RequestScheduler(rate=20, burst=5, workers=4)
+    broker = ScheduledBroker(simulated_broker(latency={"default": 0.05}), scheduler)
+
+    def scan(i: int):
+        with request_priority(RequestPriority.scan):
+            r.stocks.get_fundamentals(f"T{i:03d}")
+
+    results = {}
+    with using_broker(broker), ThreadPoolExecutor(64) as pool:
+        scans = [pool.submit(scan, i) for i in range(300)]
+        time.sleep(0.5)  # let the queue fill up
+        results["order_under_load_s"] = timed(
+            r.orders.get_all_open_option_orders, repeat=3
+        )["median_s"]
+        results["monitor_under_load_s"] = timed(
+            lambda: r.options.get_open_option_positions(), repeat=3
+        )["median_s"]
+        for scan_request in scans:
+            scan_request.result()
+    metrics = scheduler.metrics()["wait_time"]
+    results["scan_mean_wait_s"] = metrics["scan"]["mean_s"]
+    return results
+
+
+@benchmark
+def position_monitor() -> dict:
+    """20 strangles (40 legs) watched until every leg exits"""
+    from loguru import logger
+
+    import utils
+
+    logger.remove()
+    prices = {f"T{i:02d}": 100.0 + i for i in range(20)}
+    # Cheap far legs have wide spreads, the tolerance keeps their ioc sells from dying
+    broker = SimulatedBroker(prices=prices, volatility=3.0, fill_tolerance=0.5)
+    with using_broker(broker):
+        exp_date = utils.closest_friday()
+        legs = [
+            leg
+            for ticker in prices
+            for leg in utils.find_best_strikes(ticker, exp_date)
+        ]
+        broker.reset_stats()
+        started = time.perf_counter()
+        utils.monitor_trades_and_sell(legs, poll_interval=0)
+        elapsed = time.perf_counter() - started
+    calls = broker.stats()["calls"]
+    return {
+        "market_data_calls": calls.get("options.get_option_market_data_by_ids", 0)
+        + calls.get("options.get_option_market_data_by_id", 0),
+        "total_calls": sum(calls.values()),
+        "all_legs_closed_s": elapsed,
+    }
+
+
+@benchmark
+def api_calls() -> dict:
+    """Real request counts of the live flows against the simulated broker"""
+    from loguru import logger
+
+    import utils
+
+    logger.remove()
+    results = {}
+    exp_date = utils.closest_friday()
+
+    def strangle():
+        from trading_strategies.da_no_kelly_strangle import trade_strangle_without_kelly
+
+        trade_strangle_without_kelly("AAPL")
+
+    def history():
+        from trading_strategies.history_repeats_itself import history_repeats_itself
+
+        history_repeats_itself("AAPL", chunk_interval_in_min=15)
+
+    def monitor():
+        option = utils.find_best_strikes("AAPL", exp_date)[0]
+        utils.monitor_trade_and_sell(option, poll_interval=0)
+
+    for name, scenario in (
+        ("trade_strangle_without_kelly", strangle),
+        ("history_repeats_itself", history),
+        ("monitor_trade_and_sell", monitor),
+    ):
+        # Volatile enough that take-profit/stop-loss trigger within a few polls
+        with using_broker(simulated_broker(volatility=3.0, fill_tolerance=0.1)) as sim:
+            utils._strike_ladders.clear()
+            scenario()
+            results[f"{name}_calls"] = sim.stats()["total_calls"]
+    return results
+
+
+@benchmark
+def trade_ledger() -> dict:
+    """10k trades as `Trade` dataclasses vs a TradeLedger: memory, pickle size, P&L stats"""
+    import pickle
+    import tracemalloc
+    from decimal import Decimal
+
+    from back_testing.ledger import Trade, TradeLedger
+    from numeric import to_decimal
+
+    count = 10_000
+    rng = np.random.default_rng(0)
+    start = int(datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp() * 1000)
+    buy_times = (start + np.arange(count) * 120_000).tolist()
+    buys = (100 + rng.normal(0, 1, count)).tolist()
+    sells = (np.array(buys) + rng.normal(0, 0.5, count)).tolist()
+
+    def as_dataclasses() -> list:
+        return [
+            Trade(
+                datetime.fromtimestamp(b / 1000, timezone.utc),
+                datetime.fromtimestamp((b + 60_000) / 1000, timezone.utc),
+                to_decimal(buy),
+                to_decimal(sell),
+            )
+            for b, buy, sell in zip(buy_times, buys, sells)
+        ]
+
+    def as_ledger() -> TradeLedger:
+        ledger = TradeLedger()
+        for b, buy, sell in zip(buy_times, buys, sells):
+            ledger.append(b, b + 60_000, buy, sell)
+        return ledger
+
+    def peak_mb(func):
+        tracemalloc.start()
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, peak / 1e6
+
+    trades, dataclass_mb = peak_mb(as_dataclasses)
+    ledger, ledger_mb = peak_mb(as_ledger)
+
+    def dataclass_stats():
+        pnl = [t.sell_price - t.buy_price for t in trades]
+        equity, peak, drawdown = Decimal(0), Decimal(0), Decimal(0)
+        for p in pnl:
+            equity += p
+            peak = max(peak, equity)
+            drawdown = max(drawdown, peak - equity)
+        return sum(p > 0 for p in pnl) / len(pnl), drawdown
+
+    def ledger_stats():
+        return ledger.win_rate, ledger.max_drawdown
+
+    return {
+        "dataclass_build_s": timed(as_dataclasses)["min_s"],
+        "ledger_build_s": timed(as_ledger)["min_s"],
+        "dataclass_peak_mb": dataclass_mb,
+        "ledger_peak_mb": ledger_mb,
+        "dataclass_pickle_kb": len(pickle.dumps(trades)) / 1000,
+        "ledger_pickle_kb": len(pickle.dumps(ledger)) / 1000,
+        "dataclass_stats_s": timed(dataclass_stats)["min_s"],
+        "ledger_stats_s": timed(ledger_stats)["min_s"],
+    }
@@ -0,0 +1,58 @@
+"""
+Pluggable broker backend.
+
+Import `r` from here instead of `robin_stocks.robinhood` and call it exactly the same way
+(`r.stocks.get_latest_price(...)`, `r.options...`, `r.orders...`, `r.login(...)`).
+It forwards to whichever backend is active - the real Robinhood API by default (paced and
+prioritized by a `RequestScheduler`, see `scheduler.py`), or `SimulatedBroker` for offline runs/benchmarks:
+
+    with using_broker(SimulatedBroker(prices={"AAPL": 225}, latency={"default": 0.2})) as sim:
+        trade_strangle_without_kelly("AAPL")
+    print(sim.stats())
+"""
+
+from contextlib import contextmanager
+
+from broker.live import LiveBroker
+from broker.rate_limit import TokenBucket
+from broker.recording import RecordingBroker
+from broker.scheduler import RequestScheduler, ScheduledBroker, request_priority
+from broker.session import SessionManager
+from broker.simulated import SimulatedBroker
+
+_active = None
+
+
+def get_broker():
+    global _active
+    if _active is None:
+        _active = ScheduledBroker(LiveBroker())
+    return _active
+
+
+def use_broker(backend) -> None:
+    """Swaps the backend for the whole process"""
+    global _active
+    _active = backend
+
+
+@contextmanager
+def using_broker(backend):
+    previous = _active
+    use_broker(backend)
+    try:
+        yield backend
+    finally:
+        use_broker(previous)
+
+
+def is_live() -> bool:
+    return getattr(get_broker(), "live", False)
+
+
+class _BrokerProxy:
+    def __getattr__(self, name):
+        return getattr(get_broker(), name)
+
+
+r = _BrokerProxy()
@@ -0,0 +1,80 @@
+from broker.session import SessionManager
+from broker.session import session as shared_session
+
+# Instrument URLs per marketdata request, keeps the query string reasonable
+MARKET_DATA_BATCH_SIZE = 50
+
+# Attributes that work without (or are about) being logged in
+_NO_SESSION_NEEDED = {"login", "logout", "authentication", "helper", "urls"}
+
+
+class _LiveOptions:
+    """`robin_stocks.robinhood.options` plus the batched market data request it doesn't have"""
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def get_option_market_data_by_ids(self, ids: list[str], info=None) -> list[dict]:
+        """
+        Market data for many contracts in one request (per `MARKET_DATA_BATCH_SIZE`).
+        `get_option_market_data_by_id` costs 2 requests per contract: the instrument lookup + its quote.
+        """
+        from robin_stocks.robinhood.helper import filter_data, request_get
+        from robin_stocks.robinhood.urls import (
+            marketdata_options_url,
+            option_instruments_url,
+        )
+
+        data = []
+        for i in range(0, len(ids), MARKET_DATA_BATCH_SIZE):
+            urls = [
+                option_instruments_url(id) for id in ids[i : i + MARKET_DATA_BATCH_SIZE]
+            ]
+            results = request_get(
+                marketdata_options_url(), "results", {"instruments": ",".join(urls)}
+            )
+            data.extend(quote for quote in results or [] if quote)
+        return filter_data(data, info)
+
+
+class LiveBroker:
+    """
+    The real thing - every call goes straight to `robin_stocks.robinhood`.
+    The first API call logs in through the (process-wide) session manager, so there's no need to call `login()` first.
+    """
+
+    live = True
+
+    def __init__(self, session: SessionManager = shared_session):
+        self._module = None
+        self.session = session
+
+    def login(self, *args, **kwargs) -> dict:
+        if args or kwargs:
+            return self.robinhood.login(*args, **kwargs)
+        return self.session.ensure()
+
+    def logout(self) -> None:
+        self.session.invalidate()
+        self.robinhood.logout()
+
+    @property
+    def robinhood(self):
+        if self._module is None:
+            # Deferred so importing the project doesn't drag robin_stocks in until it's used
+            import robin_stocks.robinhood as robinhood
+
+            self._module = robinhood
+        return self._module
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in _NO_SESSION_NEEDED:
+            self.session.ensure()
+        if name == "options":
+            return _LiveOptions(self.robinhood.options)
+        return getattr(self.robinhood, name)
@@ -0,0 +1,42 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens are added per second up to `capacity`.
+    `acquire()` blocks until a token is available and returns how long it waited.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1, reserve: float = 0) -> float:
+        """
+        Takes the tokens if they're there (returns 0), otherwise returns the seconds to wait.
+        `reserve` tokens have to be left over afterwards - low priority callers use it to keep headroom for the rest.
+        """
+        with self._lock:
+            self._refill()
+            if self.tokens - tokens >= reserve:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens + reserve - self.tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        waited = 0.0
+        while wait := self.try_acquire(tokens):
+            time.sleep(wait)
+            waited += wait
+        return waited
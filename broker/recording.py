@@ -0,0 +1,52 @@
+"""
+Record real API responses once so they can be replayed offline by `SimulatedBroker`:
+
+    recorder = RecordingBroker(LiveBroker())
+    with using_broker(recorder):
+        trade_strangle_without_kelly("AAPL")
+    recorder.save("recordings/strangle_aapl.json")
+"""
+
+import json
+import threading
+from types import ModuleType
+
+
+def recording_key(endpoint: str, args: tuple, kwargs: dict) -> str:
+    return json.dumps([endpoint, list(args), kwargs], sort_keys=True, default=str)
+
+
+class _Recorder:
+    def __init__(self, target, prefix: str, recording: dict, lock: threading.Lock):
+        self._target = target
+        self._prefix = prefix
+        self._recording = recording
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        endpoint = f"{self._prefix}{name}"
+        if isinstance(attr, ModuleType):
+            return _Recorder(attr, f"{endpoint}.", self._recording, self._lock)
+        if not callable(attr):
+            return attr
+
+        def record(*args, **kwargs):
+            response = attr(*args, **kwargs)
+            with self._lock:
+                self._recording[recording_key(endpoint, args, kwargs)] = response
+            return response
+
+        return record
+
+
+class RecordingBroker(_Recorder):
+    """Passes every call through to another backend and keeps the responses"""
+
+    def __init__(self, backend):
+        super().__init__(backend, "", {}, threading.Lock())
+        self.live = getattr(backend, "live", False)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self._recording, f, indent=2, default=str)
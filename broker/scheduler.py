@@ -0,0 +1,245 @@
+"""
+Every API call goes through one scheduler so they share a single Robinhood budget:
+
+- A token bucket paces all requests, lower priorities have to leave some tokens behind
+  (`HEADROOM`) so orders and monitoring always find one
+- Queued requests go out in priority order: orders -> position monitoring -> scans
+- One worker only ever takes orders, so an exit never waits behind a slow in-flight scan
+- Identical reads that are already queued/in flight share the same response
+
+The priority comes from the endpoint (`orders.*` is always `order`) or the caller:
+
+    with request_priority(RequestPriority.scan):
+        find_best_strikes("AAPL", exp_date)
+"""
+
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import ModuleType
+
+from loguru import logger
+
+from broker.rate_limit import TokenBucket
+from broker.recording import recording_key
+from models import RequestPriority
+
+REQUESTS_PER_SECOND = 10
+BURST = 20
+WORKERS = 6
+# Tokens that have to be left in the bucket for each priority to take one
+HEADROOM = {
+    RequestPriority.order: 0,
+    RequestPriority.monitor: 1,
+    RequestPriority.scan: 4,
+}
+# robin_stocks groups whose functions are API calls
+ENDPOINT_GROUPS = {"stocks", "options", "orders", "markets", "account", "profiles"}
+READ_PREFIXES = ("get_", "find_", "load_")
+
+_priority: contextvars.ContextVar[RequestPriority | None] = contextvars.ContextVar(
+    "request_priority", default=None
+)
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """Sets the priority of every request made inside the block (and threads started with its context)"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def priority_for(endpoint: str) -> RequestPriority:
+    if endpoint.startswith("orders."):
+        return RequestPriority.order
+    return _priority.get() or RequestPriority.monitor
+
+
+def is_read(endpoint: str) -> bool:
+    return endpoint.rsplit(".", 1)[-1].startswith(READ_PREFIXES)
+
+
+@dataclass
+class _Job:
+    priority: RequestPriority
+    endpoint: str
+    func: object
+    args: tuple
+    kwargs: dict
+    key: str | None = None
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.monotonic)
+    started: bool = False
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        rate: float = REQUESTS_PER_SECOND,
+        burst: float = BURST,
+        workers: int = WORKERS,
+        headroom: dict[RequestPriority, float] | None = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.headroom = headroom or HEADROOM
+        # (priority, sequence, job) - a job re-queued at a better priority leaves a stale entry behind
+        self._queue: list[tuple[RequestPriority, int, _Job]] = []
+        self._in_flight: dict[str, _Job] = {}  # read key -> job, queued or running
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        # wait time stats per priority: count, total, max
+        self._waits = defaultdict(lambda: [0, 0.0, 0.0])
+        self.executed = 0
+        self.coalesced = 0
+        self._threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(priority,),
+                name=f"rh-scheduler-{i}",
+                daemon=True,
+            )
+            for i, priority in enumerate(
+                # The reserved order worker + general workers that take anything
+                [RequestPriority.order] + [RequestPriority.scan] * max(1, workers - 1)
+            )
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, endpoint: str, func, args: tuple, kwargs: dict) -> Future:
+        priority = priority_for(endpoint)
+        key = recording_key(endpoint, args, kwargs) if is_read(endpoint) else None
+        with self._work:
+            if key and (job := self._in_flight.get(key)):
+                self.coalesced += 1
+                if priority < job.priority and not job.started:
+                    # Same request, more urgent caller - queue it again at the better priority
+                    job.priority = priority
+                    self._push(job)
+                return job.future
+            job = _Job(priority, endpoint, func, args, kwargs, key)
+            if key:
+                self._in_flight[key] = job
+            self._push(job)
+        return job.future
+
+    def call(self, endpoint: str, func, args: tuple, kwargs: dict):
+        return self.submit(endpoint, func, args, kwargs).result()
+
+    def _push(self, job: _Job) -> None:
+        heapq.heappush(self._queue, (job.priority, next(self._sequence), job))
+        self._work.notify_all()
+
+    def _next_job(self, lowest_priority: RequestPriority) -> _Job | None:
+        """Highest priority job this worker may take, dropping stale entries (lock held)"""
+        while self._queue:
+            priority, _, job = self._queue[0]
+            if job.started or priority != job.priority:
+                heapq.heappop(self._queue)
+                continue
+            return job if priority <= lowest_priority else None
+        return None
+
+    def _worker(self, lowest_priority: RequestPriority) -> None:
+        while True:
+            with self._work:
+                while not (job := self._next_job(lowest_priority)):
+                    self._work.wait()
+                wait = self.bucket.try_acquire(reserve=self.headroom[job.priority])
+                if not wait:
+                    heapq.heappop(self._queue)
+                    job.started = True
+            if wait:
+                # Checks again afterwards - something more urgent may have come in meanwhile
+                time.sleep(min(wait, 0.05))
+                continue
+            self._run(job)
+
+    def _run(self, job: _Job) -> None:
+        waited = time.monotonic() - job.queued_at
+        result = error = None
+        try:
+            result = job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            error = e
+        with self._lock:
+            # Later identical reads make a fresh request from here on
+            if job.key:
+                self._in_flight.pop(job.key, None)
+            stats = self._waits[job.priority]
+            stats[0] += 1
+            stats[1] += waited
+            stats[2] = max(stats[2], waited)
+            self.executed += 1
+        if error:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def metrics(self) -> dict:
+        """Queue depth and time spent queued, per priority"""
+        with self._lock:
+            depth = defaultdict(int)
+            for priority, _, job in self._queue:
+                if not job.started and priority == job.priority:
+                    depth[priority.name] += 1
+            return {
+                "queue_depth": dict(depth),
+                "wait_time": {
+                    priority.name: {
+                        "requests": count,
+                        "mean_s": total / count if count else 0.0,
+                        "max_s": longest,
+                    }
+                    for priority, (count, total, longest) in self._waits.items()
+                },
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "tokens": self.bucket.tokens,
+            }
+
+    def log_metrics(self) -> None:
+        logger.info(f"Request scheduler: {self.metrics()}")
+
+
+class _ScheduledGroup:
+    def __init__(self, target, group: str, scheduler: RequestScheduler):
+        self._target = target
+        self._group = group
+        self._scheduler = scheduler
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        endpoint = f"{self._group}.{name}"
+        return lambda *args, **kwargs: self._scheduler.call(
+            endpoint, attr, args, kwargs
+        )
+
+
+class ScheduledBroker:
+    """Wraps any backend so its API calls (`r.<group>.<name>(...)`) go through a `RequestScheduler`"""
+
+    def __init__(self, backend, scheduler: RequestScheduler | None = None):
+        self.backend = backend
+        self.scheduler = scheduler or RequestScheduler()
+        self.live = getattr(backend, "live", False)
+
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if name in ENDPOINT_GROUPS and (
+            isinstance(attr, ModuleType) or not callable(attr)
+        ):
+            return _ScheduledGroup(attr, name, self.scheduler)
+        return attr  # login/logout, stats() etc. aren't rate limited
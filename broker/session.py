@@ -0,0 +1,173 @@
+"""
+One Robinhood session per process, persisted between runs.
+
+The token is saved to `~/.tokens/rh_trading_session.json` with its expiry, so a cold start only
+reads that file. It's refreshed (refresh token grant) in the background a few minutes before
+it lapses, and a full login (.env credentials + TOTP) only happens when there's nothing usable.
+`LiveBroker` calls `ensure()` on the first API call, so nobody has to log in up front.
+"""
+
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+# Same public client id robin_stocks logs in with
+CLIENT_ID = "c82SH0WZOsabOXGP2sxqcj34FxkvfnWRZBKlBjFS"
+DEFAULT_TOKEN_FILE = Path.home() / ".tokens" / "rh_trading_session.json"
+SESSION_SECONDS = 24 * 60 * 60
+REFRESH_MARGIN_SECONDS = 5 * 60
+PICKLE_NAME = "_rh_trading"
+
+
+class SessionManager:
+    def __init__(
+        self,
+        token_file: Path | str = DEFAULT_TOKEN_FILE,
+        expires_in: int = SESSION_SECONDS,
+        refresh_margin: float = REFRESH_MARGIN_SECONDS,
+    ):
+        self.token_file = Path(token_file)
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self.token: dict | None = None
+        self._lock = threading.RLock()
+        self._refresh_timer: threading.Timer | None = None
+
+    @property
+    def valid(self) -> bool:
+        return bool(self.token) and (
+            self.token["expires_at"] - time.time() > self.refresh_margin
+        )
+
+    def ensure(self) -> dict:
+        """The current token - from memory, the token file, a refresh or a full login, in that order"""
+        if self.valid:
+            return self.token
+        with self._lock:
+            if self.valid:
+                return self.token
+            token = self._load()
+            if token and token["expires_at"] - time.time() > self.refresh_margin:
+                logger.info(f"Reusing Robinhood session from {self.token_file}")
+            elif token and token.get("refresh_token"):
+                token = self._refresh(token) or self._login()
+            else:
+                token = self._login()
+            self._apply(token)
+            return token
+
+    def refresh(self) -> None:
+        """Swaps the token for a fresh one before it expires, falls back to a full login"""
+        with self._lock:
+            token = (self.token and self._refresh(self.token)) or self._login()
+            self._apply(token)
+
+    def invalidate(self) -> None:
+        """Forget the token (i.e. it got revoked) so the next call logs in again"""
+        with self._lock:
+            if self._refresh_timer:
+                self._refresh_timer.cancel()
+            self.token = None
+            self.token_file.unlink(missing_ok=True)
+
+    def _load(self) -> dict | None:
+        try:
+            return json.loads(self.token_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, token: dict) -> None:
+        self.token_file.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.token_file.with_suffix(".tmp")
+        with open(
+            os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w"
+        ) as f:
+            json.dump(token, f)
+        os.replace(partial, self.token_file)
+
+    def _apply(self, token: dict) -> None:
+        from robin_stocks.robinhood.helper import set_login_state, update_session
+
+        update_session(
+            "Authorization", f"{token['token_type']} {token['access_token']}"
+        )
+        set_login_state(True)
+        self.token = token
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_timer:
+            self._refresh_timer.cancel()
+        delay = max(0.0, self.token["expires_at"] - time.time() - self.refresh_margin)
+        self._refresh_timer = threading.Timer(delay, self._background_refresh)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            # The next API call will try again through `ensure()`
+            logger.error(f"Background session refresh failed: {e}")
+            self.token = None
+
+    def _token_from(self, data: dict, device_token: str) -> dict:
+        token = {
+            "token_type": data["token_type"],
+            "access_token": data["access_token"],
+            "refresh_token": data.get("refresh_token"),
+            "device_token": device_token,
+            "expires_at": time.time() + int(data.get("expires_in") or self.expires_in),
+        }
+        self._save(token)
+        return token
+
+    def _refresh(self, token: dict) -> dict | None:
+        from robin_stocks.robinhood.helper import request_post
+        from robin_stocks.robinhood.urls import login_url
+
+        data = request_post(
+            login_url(),
+            {
+                "client_id": CLIENT_ID,
+                "grant_type": "refresh_token",
+                "refresh_token": token["refresh_token"],
+                "scope": "internal",
+                "expires_in": self.expires_in,
+                "device_token": token["device_token"],
+            },
+        )
+        if not data or "access_token" not in data:
+            logger.warning("Couldn't refresh the Robinhood session, logging in again")
+            return None
+        logger.info("Refreshed Robinhood session")
+        return self._token_from(data, token["device_token"])
+
+    def _login(self) -> dict:
+        import pyotp
+        import robin_stocks.robinhood as robinhood
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        logger.info("Logging in to Robinhood")
+        data = robinhood.login(
+            os.getenv("EMAIL"),
+            os.getenv("PASSWORD"),
+            expiresIn=self.expires_in,
+            mfa_code=pyotp.TOTP(os.getenv("MFA_CODE")).now(),
+            pickle_name=PICKLE_NAME,
+        )
+        # robin_stocks doesn't hand back the device token the refresh grant needs, only its pickle has it
+        with open(
+            Path.home() / ".tokens" / f"robinhood{PICKLE_NAME}.pickle", "rb"
+        ) as f:
+            device_token = pickle.load(f)["device_token"]
+        return self._token_from(data, device_token)
+
+
+session = SessionManager()
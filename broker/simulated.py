@@ -0,0 +1,612 @@
+"""
+Offline stand-in for `robin_stocks.robinhood`, so utils and the strategies can run
+(and be measured) with no network and no Robinhood account.
+
+- Same call shapes as robin_stocks: `r.stocks.get_latest_price(...)`, `r.options...`, `r.orders...`
+- Serves recorded responses (see `recording.py`) when it has one for the exact call,
+  otherwise synthetic data: seeded random-walk quotes, strike ladders around the
+  current price, Black-Scholes priced option quotes/greeks, immediate limit fills
+- Per-endpoint latency and rate limits, and it counts every call so we can see
+  exactly how many requests and how much waiting a flow costs
+"""
+
+import copy
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+from broker.rate_limit import TokenBucket
+from broker.recording import recording_key
+
+# Rough minutes of data per day for each `bounds` and trading days per `span`
+MINUTES_PER_DAY = {"regular": 390, "trading": 510, "extended": 960}
+DAYS_PER_SPAN = {
+    "day": 1,
+    "week": 5,
+    "month": 21,
+    "3months": 63,
+    "year": 252,
+    "5year": 1260,
+}
+INTERVAL_MINUTES = {"5minute": 5, "10minute": 10, "hour": 60}
+
+
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def _norm_pdf(x: float) -> float:
+    return math.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def _as_list(symbols) -> list[str]:
+    if isinstance(symbols, str):
+        return [symbols.upper().strip()]
+    return [symbol.upper().strip() for symbol in symbols]
+
+
+def _filter(data, info):
+    if info is None:
+        return data
+    if isinstance(data, list):
+        return [item[info] for item in data]
+    return data[info]
+
+
+class _Endpoints:
+    """Exposes a group of simulated endpoints as `<group>.<name>(...)` like robin_stocks"""
+
+    def __init__(self, broker: "SimulatedBroker", group: str):
+        self._broker = broker
+        self._group = group
+
+    def __getattr__(self, name):
+        handler = getattr(self._broker, f"_{self._group}_{name}", None)
+        if handler is None:
+            raise AttributeError(
+                f"SimulatedBroker doesn't implement {self._group}.{name}"
+            )
+        endpoint = f"{self._group}.{name}"
+        return lambda *args, **kwargs: self._broker.call(
+            endpoint, handler, args, kwargs
+        )
+
+
+class SimulatedBroker:
+    live = False
+
+    def __init__(
+        self,
+        prices: dict[str, float] | None = None,
+        volatility: float = 0.35,
+        latency: dict[str, float] | None = None,
+        rate_limits: dict[str, tuple[float, float]] | None = None,
+        recording: str | dict | None = None,
+        fill_tolerance: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        - prices: starting price per ticker (anything else starts at 100)
+        - volatility: annualized vol for the random walk + the implied vol of every option
+        - latency: seconds per call, by endpoint ("stocks.get_latest_price") with a "default"
+        - rate_limits: (requests per second, burst) by endpoint, "*" applies to every call
+        - recording: a `RecordingBroker.save()` file (or its dict) to replay responses from
+        - fill_tolerance: limit orders this far (fraction of the quote) from crossing the spread still fill
+        """
+        self.prices = {
+            ticker.upper(): price for ticker, price in (prices or {}).items()
+        }
+        self.volatility = volatility
+        self.latency = {"default": 0.0, **(latency or {})}
+        self.buckets = {
+            endpoint: TokenBucket(rate, burst)
+            for endpoint, (rate, burst) in (rate_limits or {}).items()
+        }
+        if isinstance(recording, str):
+            with open(recording) as f:
+                recording = json.load(f)
+        self.recording = recording or {}
+        self.fill_tolerance = fill_tolerance
+        self.rng = random.Random(seed)
+        self.orders_by_id: dict[str, dict] = {}
+        self.positions: dict[str, dict] = {}  # option id -> position
+        self.instruments: dict[str, dict] = {}  # option id -> instrument data
+        self.calls: Counter = Counter()
+        self.wait_time: defaultdict = defaultdict(float)
+        self._lock = threading.RLock()
+
+        self.stocks = _Endpoints(self, "stocks")
+        self.options = _Endpoints(self, "options")
+        self.orders = _Endpoints(self, "orders")
+
+    # ---- plumbing -------------------------------------------------------------------
+
+    def call(self, endpoint: str, handler, args: tuple, kwargs: dict):
+        """Every simulated request goes through here: rate limit -> latency -> response"""
+        waited = 0.0
+        for key in ("*", endpoint):
+            if bucket := self.buckets.get(key):
+                waited += bucket.acquire()
+        delay = self.latency.get(endpoint, self.latency["default"])
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.wait_time[endpoint] += waited + delay
+            recorded = self.recording.get(recording_key(endpoint, args, kwargs))
+        if recorded is not None:
+            return copy.deepcopy(recorded)
+        return handler(*args, **kwargs)
+
+    def stats(self) -> dict:
+        """API calls and seconds spent waiting (latency + throttling), per endpoint and in total"""
+        return {
+            "calls": dict(self.calls),
+            "total_calls": sum(self.calls.values()),
+            "wait_time": dict(self.wait_time),
+            "total_wait_time": sum(self.wait_time.values()),
+        }
+
+    def reset_stats(self) -> None:
+        self.calls.clear()
+        self.wait_time.clear()
+
+    def login(self, *args, **kwargs) -> dict:
+        return self.call("login", self._login, args, kwargs)
+
+    def logout(self, *args, **kwargs) -> None:
+        return self.call("logout", lambda: None, (), {})
+
+    def _login(self, *args, **kwargs) -> dict:
+        return {
+            "access_token": "simulated",
+            "token_type": "Bearer",
+            "expires_in": 86400,
+            "refresh_token": "simulated",
+            "detail": "logged in to the simulated broker",
+        }
+
+    # ---- synthetic market -----------------------------------------------------------
+
+    def price(self, ticker: str) -> float:
+        """Current price (each quote / option market data request moves it one random-walk step)"""
+        return self.prices.setdefault(ticker.upper(), 100.0)
+
+    def _step(self, ticker: str) -> float:
+        with self._lock:
+            price = self.price(ticker)
+            # one step ~ one minute of trading
+            sigma = self.volatility / math.sqrt(252 * 390)
+            price *= math.exp(self.rng.gauss(0, sigma))
+            self.prices[ticker.upper()] = price
+            return price
+
+    def _strike_step(self, price: float) -> float:
+        if price < 50:
+            return 0.5
+        if price < 200:
+            return 1.0
+        return 5.0
+
+    def _years_to_expiry(self, expiration_date: str) -> float:
+        # Options stop trading at 4pm ET ~ 21:00 UTC
+        expires = datetime.fromisoformat(expiration_date).replace(
+            hour=21, tzinfo=timezone.utc
+        )
+        seconds = (expires - datetime.now(timezone.utc)).total_seconds()
+        return max(seconds, 3600) / (365 * 24 * 3600)
+
+    def _instrument(
+        self, ticker: str, expiration_date: str, strike: float, option_type: str
+    ) -> dict:
+        option_id = str(
+            uuid.uuid5(
+                uuid.NAMESPACE_URL, f"{ticker}:{expiration_date}:{strike}:{option_type}"
+            )
+        )
+        instrument = self.instruments.get(option_id)
+        if instrument is None:
+            instrument = {
+                "id": option_id,
+                "url": f"https://api.robinhood.com/options/instruments/{option_id}/",
+                "chain_symbol": ticker,
+                "expiration_date": expiration_date,
+                "strike_price": f"{strike:.4f}",
+                "type": option_type,
+                "state": "active",
+                "tradability": "tradable",
+            }
+            self.instruments[option_id] = instrument
+        return dict(instrument)
+
+    def _chain(
+        self, ticker: str, expiration_date: str, option_type: str | None
+    ) -> list[dict]:
+        price = self.price(ticker)
+        step = self._strike_step(price)
+        lowest = math.floor(price * 0.8 / step) * step
+        strikes = [lowest + i * step for i in range(int(price * 0.4 / step) + 1)]
+        types = [option_type] if option_type else ["call", "put"]
+        return [
+            self._instrument(ticker, expiration_date, strike, kind)
+            for kind in types
+            for strike in strikes
+        ]
+
+    def _quote(self, instrument: dict) -> dict:
+        """Black-Scholes mark + greeks for the contract at the current underlying price"""
+        spot = self.price(instrument["chain_symbol"])
+        strike = float(instrument["strike_price"])
+        years = self._years_to_expiry(instrument["expiration_date"])
+        vol, rate = self.volatility, 0.04
+        d1 = (math.log(spot / strike) + (rate + vol**2 / 2) * years) / (
+            vol * math.sqrt(years)
+        )
+        d2 = d1 - vol * math.sqrt(years)
+        discount = math.exp(-rate * years)
+        if instrument["type"] == "call":
+            mark = spot * _norm_cdf(d1) - strike * discount * _norm_cdf(d2)
+            delta = _norm_cdf(d1)
+            rho = strike * years * discount * _norm_cdf(d2) / 100
+            theta_rate = -rate * strike * discount * _norm_cdf(d2)
+        else:
+            mark = strike * discount * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+            delta = _norm_cdf(d1) - 1
+            rho = -strike * years * discount * _norm_cdf(-d2) / 100
+            theta_rate = rate * strike * discount * _norm_cdf(-d2)
+        theta = (
+            -spot * _norm_pdf(d1) * vol / (2 * math.sqrt(years)) + theta_rate
+        ) / 365
+        mark = max(mark, 0.01)
+        spread = max(0.01, round(mark * 0.02, 2))
+        bid, ask = max(0.01, mark - spread / 2), mark + spread / 2
+        return {
+            "instrument": instrument["url"],
+            "instrument_id": instrument["id"],
+            "symbol": instrument["chain_symbol"],
+            "adjusted_mark_price": f"{mark:.4f}",
+            "mark_price": f"{mark:.4f}",
+            "ask_price": f"{ask:.2f}",
+            "ask_size": 10,
+            "bid_price": f"{bid:.2f}",
+            "bid_size": 10,
+            "last_trade_price": f"{mark:.2f}",
+            "high_fill_rate_buy_price": f"{ask:.2f}",
+            "low_fill_rate_buy_price": f"{mark:.2f}",
+            "high_fill_rate_sell_price": f"{bid:.2f}",
+            "low_fill_rate_sell_price": f"{mark:.2f}",
+            "delta": f"{delta:.6f}",
+            "gamma": f"{_norm_pdf(d1) / (spot * vol * math.sqrt(years)):.6f}",
+            "theta": f"{theta:.6f}",
+            "vega": f"{spot * _norm_pdf(d1) * math.sqrt(years) / 100:.6f}",
+            "rho": f"{rho:.6f}",
+            "implied_volatility": f"{vol:.6f}",
+            "chance_of_profit_long": f"{1 - abs(delta):.6f}",
+            "chance_of_profit_short": f"{abs(delta):.6f}",
+            "open_interest": 1000,
+            "volume": 100,
+        }
+
+    # ---- stocks ---------------------------------------------------------------------
+
+    def _stocks_get_latest_price(
+        self, inputSymbols, priceType=None, includeExtendedHours=True
+    ):
+        return [f"{self._step(ticker):.4f}" for ticker in _as_list(inputSymbols)]
+
+    def _stocks_get_fundamentals(self, inputSymbols, info=None):
+        data = []
+        for ticker in _as_list(inputSymbols):
+            price = self.price(ticker)
+            data.append(
+                {
+                    "symbol": ticker,
+                    "open": f"{price * 0.995:.4f}",
+                    "high": f"{price * 1.01:.4f}",
+                    "low": f"{price * 0.99:.4f}",
+                    "high_52_weeks": f"{price * 1.3:.4f}",
+                    "low_52_weeks": f"{price * 0.7:.4f}",
+                }
+            )
+        return _filter(data, info)
+
+    def _stocks_get_stock_historicals(
+        self, inputSymbols, interval="hour", span="week", bounds="regular", info=None
+    ):
+        interval = str(getattr(interval, "value", interval))
+        span = str(getattr(span, "value", span))
+        bounds = str(getattr(bounds, "value", bounds))
+        days = DAYS_PER_SPAN.get(span, 1)
+        minutes_per_day = MINUTES_PER_DAY.get(bounds, 390)
+        if interval == "day":
+            bars, minutes = days, 24 * 60
+        elif interval == "week":
+            bars, minutes = max(1, days // 5), 7 * 24 * 60
+        else:
+            minutes = INTERVAL_MINUTES.get(interval, 60)
+            bars = days * minutes_per_day // minutes
+        sigma = self.volatility * math.sqrt(min(minutes, minutes_per_day) / (252 * 390))
+
+        data = []
+        for ticker in _as_list(inputSymbols):
+            # Walk backwards from the current price so the last close is "now"
+            close = self.price(ticker)
+            start = datetime.now(timezone.utc) - timedelta(minutes=minutes * bars)
+            candles = []
+            for i in range(bars, 0, -1):
+                open_ = close * math.exp(-self.rng.gauss(0, sigma))
+                high = max(open_, close) * (1 + abs(self.rng.gauss(0, sigma / 2)))
+                low = min(open_, close) * (1 - abs(self.rng.gauss(0, sigma / 2)))
+                candles.append(
+                    {
+                        "begins_at": (start + timedelta(minutes=minutes * (i - 1)))
+                        .replace(microsecond=0)
+                        .isoformat()
+                        .replace("+00:00", "Z"),
+                        "open_price": f"{open_:.4f}",
+                        "close_price": f"{close:.4f}",
+                        "high_price": f"{high:.4f}",
+                        "low_price": f"{low:.4f}",
+                        "volume": self.rng.randint(1_000, 100_000),
+                        "session": "reg",
+                        "interpolated": False,
+                        "symbol": ticker,
+                    }
+                )
+                close = open_
+            data.extend(reversed(candles))
+        return _filter(data, info)
+
+    # ---- options --------------------------------------------------------------------
+
+    def _options_find_tradable_options(
+        self, symbol, expirationDate=None, strikePrice=None, optionType=None, info=None
+    ):
+        ticker = symbol.upper().strip()
+        option_type = (
+            str(getattr(optionType, "value", optionType)) if optionType else None
+        )
+        if expirationDate:
+            expirations = [expirationDate]
+        else:
+            today = datetime.now(timezone.utc).date()
+            friday = today + timedelta((4 - today.weekday()) % 7)
+            expirations = [(friday + timedelta(weeks=w)).isoformat() for w in range(4)]
+        data = [
+            option
+            for expiration in expirations
+            for option in self._chain(ticker, expiration, option_type)
+            if strikePrice is None
+            or float(option["strike_price"]) == float(strikePrice)
+        ]
+        return _filter(data, info)
+
+    def _with_market_data(self, options: list[dict]) -> list[dict]:
+        # robin_stocks does 1 market data request per contract here, so we do too
+        for option in options:
+            option.update(self.options.get_option_market_data_by_id(option["id"])[0])
+        return options
+
+    def _options_find_options_by_expiration(
+        self, inputSymbols, expirationDate, optionType=None, info=None
+    ):
+        data = []
+        for ticker in _as_list(inputSymbols):
+            data += self._with_market_data(
+                self.options.find_tradable_options(
+                    ticker, expirationDate, None, optionType
+                )
+            )
+        return _filter(data, info)
+
+    def _options_find_options_by_strike(
+        self, inputSymbols, strikePrice, optionType=None, info=None
+    ):
+        data = []
+        for ticker in _as_list(inputSymbols):
+            data += self._with_market_data(
+                self.options.find_tradable_options(
+                    ticker, None, strikePrice, optionType
+                )
+            )
+        return _filter(data, info)
+
+    def _options_find_options_by_expiration_and_strike(
+        self, inputSymbols, expirationDate, strikePrice, optionType=None, info=None
+    ):
+        data = []
+        for ticker in _as_list(inputSymbols):
+            data += self._with_market_data(
+                self.options.find_tradable_options(
+                    ticker, expirationDate, strikePrice, optionType
+                )
+            )
+        return _filter(data, info)
+
+    def _options_get_option_market_data_by_id(self, id, info=None):
+        instrument = self.instruments.get(id)
+        if instrument is None:
+            return []
+        # The market moves between requests, not on a wall clock, so runs are reproducible
+        self._step(instrument["chain_symbol"])
+        return _filter([self._quote(instrument)], info)
+
+    def _options_get_option_market_data_by_ids(self, ids, info=None):
+        instruments = [self.instruments[id] for id in ids if id in self.instruments]
+        for ticker in {instrument["chain_symbol"] for instrument in instruments}:
+            self._step(ticker)
+        return _filter([self._quote(instrument) for instrument in instruments], info)
+
+    def _options_get_open_option_positions(self, info=None):
+        with self._lock:
+            data = [
+                dict(p) for p in self.positions.values() if float(p["quantity"]) > 0
+            ]
+        return _filter(data, info)
+
+    # ---- orders ---------------------------------------------------------------------
+
+    def _place_option_order(
+        self,
+        side,
+        position_effect,
+        price,
+        symbol,
+        quantity,
+        expirationDate,
+        strike,
+        optionType,
+        timeInForce,
+    ) -> dict:
+        option_type = str(getattr(optionType, "value", optionType))
+        instrument = self._instrument(
+            symbol.upper().strip(), expirationDate, float(strike), option_type
+        )
+        order = {
+            "id": str(uuid.uuid4()),
+            "chain_symbol": instrument["chain_symbol"],
+            "direction": "debit" if side == "buy" else "credit",
+            "price": f"{float(price):.2f}",
+            "quantity": f"{float(quantity):.5f}",
+            "processed_quantity": "0.00000",
+            "time_in_force": timeInForce,
+            "type": "limit",
+            "state": "queued",
+            "cancel_url": "simulated",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "legs": [
+                {
+                    "option": instrument["url"],
+                    "option_id": instrument["id"],
+                    "side": side,
+                    "position_effect": position_effect,
+                    "ratio_quantity": 1,
+                }
+            ],
+        }
+        with self._lock:
+            self.orders_by_id[order["id"]] = order
+            self._match(order)
+        return dict(order)
+
+    def _match(self, order: dict) -> None:
+        """Fills a queued limit order if it crosses the current quote, ioc orders die otherwise"""
+        if order["state"] != "queued":
+            return
+        leg = order["legs"][0]
+        quote = self._quote(self.instruments[leg["option_id"]])
+        price = float(order["price"])
+        if leg["side"] == "buy":
+            fillable = price >= float(quote["ask_price"]) * (1 - self.fill_tolerance)
+        else:
+            fillable = price <= float(quote["bid_price"]) * (1 + self.fill_tolerance)
+
+        if fillable:
+            order["state"] = "filled"
+            order["processed_quantity"] = order["quantity"]
+            order["cancel_url"] = None
+            quantity = float(order["quantity"]) * (1 if leg["side"] == "buy" else -1)
+            position = self.positions.setdefault(
+                leg["option_id"],
+                {
+                    "id": str(uuid.uuid4()),
+                    "option": leg["option"],
+                    "option_id": leg["option_id"],
+                    "chain_symbol": order["chain_symbol"],
+                    "type": "long",
+                    "quantity": "0.0000",
+                    "average_price": "0.0000",
+                },
+            )
+            held = float(position["quantity"])
+            if quantity > 0:
+                average = (
+                    held * float(position["average_price"]) + quantity * price * 100
+                ) / (held + quantity)
+                position["average_price"] = f"{average:.4f}"
+            position["quantity"] = f"{max(0.0, held + quantity):.4f}"
+        elif order["time_in_force"] in ("ioc", "fok"):
+            order["state"] = "cancelled"
+            order["cancel_url"] = None
+
+    def _orders_order_buy_option_limit(
+        self,
+        positionEffect,
+        creditOrDebit,
+        price,
+        symbol,
+        quantity,
+        expirationDate,
+        strike,
+        optionType="both",
+        timeInForce="gtc",
+        jsonify=True,
+    ):
+        return self._place_option_order(
+            "buy",
+            positionEffect,
+            price,
+            symbol,
+            quantity,
+            expirationDate,
+            strike,
+            optionType,
+            timeInForce,
+        )
+
+    def _orders_order_sell_option_limit(
+        self,
+        positionEffect,
+        creditOrDebit,
+        price,
+        symbol,
+        quantity,
+        expirationDate,
+        strike,
+        optionType="both",
+        timeInForce="gtc",
+        jsonify=True,
+    ):
+        return self._place_option_order(
+            "sell",
+            positionEffect,
+            price,
+            symbol,
+            quantity,
+            expirationDate,
+            strike,
+            optionType,
+            timeInForce,
+        )
+
+    def _orders_get_all_open_option_orders(self, info=None):
+        with self._lock:
+            for order in self.orders_by_id.values():
+                self._match(
+                    order
+                )  # resting orders get another shot at the current quote
+            data = [dict(o) for o in self.orders_by_id.values() if o["cancel_url"]]
+        return _filter(data, info)
+
+    def _orders_get_all_option_orders(self, info=None):
+        with self._lock:
+            data = [dict(o) for o in self.orders_by_id.values()]
+        return _filter(data, info)
+
+    def _orders_get_option_order_info(self, order_id):
+        with self._lock:
+            order = self.orders_by_id.get(order_id)
+            return dict(order) if order else {"detail": "Not found."}
+
+    def _orders_cancel_option_order(self, orderID):
+        with self._lock:
+            order = self.orders_by_id.get(orderID)
+            if order and order["cancel_url"]:
+                order["state"] = "cancelled"
+                order["cancel_url"] = None
+            return {}
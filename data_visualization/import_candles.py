@@ -3,48 +3,198 @@
 import json
 import os
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
 
 import requests
+from candle_store import CandleStore
 from dotenv import load_dotenv
 from jesse.modes.import_candles_mode import (
     store_candles_list as store_candles_from_list,
 )
 from jesse.services.db import database
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 load_dotenv()
 api_key: str = os.getenv("API_KEY")
 
+CHUNK_DAYS = 7  # one request per week of 1m candles
+MAX_CONCURRENT_REQUESTS = 4
+INSERT_BATCH_SIZE = 5_000
+CHECKPOINT_FILE = "import_checkpoint.json"
+
 """
 Given a ticker and a date range, it will store historical candle data
 in the local docker db instance for backtesting strategies on.
+- The range is split into CHUNK_DAYS chunks that get fetched concurrently
+- Each chunk is converted and inserted in batches as soon as it lands
+- Finished chunks are checkpointed, so re-running a crashed import picks up where it stopped
 """
 
 
-def db_import(ticker, start_date, end_date, api_key) -> None:
-    headers = {"Accept": "application/json", "Authorization": f"Bearer {api_key}"}
-    url = f"https://api.marketdata.app/v1/stocks/candles/1/{ticker}?from={start_date}&to={end_date}"
-    candles = json.loads(requests.request("GET", url, headers=headers).text)
-    arr = [
-        {
+def date_chunks(
+    start_date: str, end_date: str, chunk_days: int
+) -> list[tuple[str, str]]:
+    """Inclusive (from, to) date pairs covering the whole range"""
+    chunks = []
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    while start <= end:
+        chunk_end = min(start + timedelta(days=chunk_days - 1), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def http_session(pool_size: int, api_key: str) -> requests.Session:
+    """Keep-alive connections shared by every chunk request + retries on throttling/5xx"""
+    session = requests.Session()
+    session.headers.update(
+        {"Accept": "application/json", "Authorization": f"Bearer {api_key}"}
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(
+            total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504]
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_chunk(session: requests.Session, ticker: str, start: str, end: str) -> dict:
+    url = (
+        f"https://api.marketdata.app/v1/stocks/candles/1/{ticker}?from={start}&to={end}"
+    )
+    response = session.get(url, timeout=60)
+    if response.status_code == 404 and _is_no_data(response):
+        return {"t": [], "o": [], "h": [], "l": [], "c": [], "v": []}
+    # Anything else that failed (5xx, gateway HTML pages...) shows up as an HTTPError
+    response.raise_for_status()
+    return response.json()
+
+
+def _is_no_data(response: requests.Response) -> bool:
+    """404 + {"s": "no_data"} is how the API says there are no candles (weekends, holidays)"""
+    try:
+        return response.json().get("s") == "no_data"
+    except ValueError:  # a 404 that isn't the API's JSON
+        return False
+
+
+def candle_rows(ticker: str, candles: dict) -> Iterator[dict]:
+    """The rows jesse's `store_candles_list` wants, built lazily one at a time"""
+    for t, o, c, h, low, v in zip(
+        candles["t"],
+        candles["o"],
+        candles["c"],
+        candles["h"],
+        candles["l"],
+        candles["v"],
+    ):
+        yield {
             "id": str(uuid.uuid4()),
             "exchange": "NYSE",
             "symbol": f"NYSE-{ticker}",
             "timeframe": "1m",
-            "timestamp": candles["t"][i] * 1000,
-            "open": candles["o"][i],
-            "close": candles["c"][i],
-            "high": candles["h"][i],
-            "low": candles["l"][i],
-            "volume": candles["v"][i],
+            "timestamp": t * 1000,
+            "open": o,
+            "close": c,
+            "high": h,
+            "low": low,
+            "volume": v,
         }
-        for i in range(len(candles["t"]))
-    ]
+
+
+def batched(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def load_checkpoint(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["completed_chunks"])
+
+
+def save_checkpoint(path: str, completed: set[str]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"completed_chunks": sorted(completed)}, f)
+    os.replace(tmp_path, path)  # atomic, a crash never leaves a half-written checkpoint
+
+
+def db_import(
+    ticker,
+    start_date,
+    end_date,
+    api_key,
+    chunk_days: int = CHUNK_DAYS,
+    max_workers: int = MAX_CONCURRENT_REQUESTS,
+) -> None:
+    store = CandleStore()
+    checkpoint_path = str(store.root / ticker.upper() / CHECKPOINT_FILE)
+    completed = load_checkpoint(checkpoint_path)
+    chunks = iter(
+        [
+            chunk
+            for chunk in date_chunks(start_date, end_date, chunk_days)
+            if ":".join(chunk) not in completed
+        ]
+    )
+    failed = []
+
     database.open_connection()
-    store_candles_from_list(arr)
-    database.close_connection()
+    try:
+        with (
+            http_session(max_workers, api_key) as session,
+            ThreadPoolExecutor(max_workers=max_workers) as pool,
+        ):
+            # Bounded number of chunks in flight so memory doesn't grow with the date range
+            in_flight = {
+                pool.submit(fetch_chunk, session, ticker, *chunk): chunk
+                for chunk in islice(chunks, max_workers * 2)
+            }
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    if next_chunk := next(chunks, None):
+                        in_flight[
+                            pool.submit(fetch_chunk, session, ticker, *next_chunk)
+                        ] = next_chunk
+                    try:
+                        candles = future.result()
+                    except Exception as e:
+                        logger.error(f"{ticker} {chunk[0]} -> {chunk[1]} failed: {e}")
+                        failed.append(chunk)
+                        continue
+
+                    for batch in batched(
+                        candle_rows(ticker, candles), INSERT_BATCH_SIZE
+                    ):
+                        store_candles_from_list(batch)
+                    # Local columnar copy so the backtester / run_strat.py can read candles without Postgres
+                    store.append(ticker, candles)
+                    completed.add(":".join(chunk))
+                    save_checkpoint(checkpoint_path, completed)
+                    logger.info(
+                        f"{ticker} {chunk[0]} -> {chunk[1]}: {len(candles['t'])} candles imported"
+                    )
+    finally:
+        database.close_connection()
 
-    with open(f"./ticker_data/{ticker}/candle_data.json", "w") as f:
-        json.dump({"data": arr}, f, indent=4)
+    if failed:
+        logger.warning(
+            f"{ticker}: {len(failed)} chunk(s) failed - run the import again to resume"
+        )
 
 
 # Customize ur dates here (free for the last year of data)
@@ -0,0 +1,136 @@
+"""
+Profiles one jesse backtest and shows how much of it goes to indicators - and how much of
+that is duplicate work (the same indicator on the same candles computed more than once):
+
+    python profile_strat.py SwingTraderV1 AAPL 2024-01-02:2024-12-31
+    python profile_strat.py SimpleDonchian TSLA 2024-01-02:2024-06-28 --top 30
+
+Every `jesse.indicators` function gets wrapped for the run, a call is a duplicate when the
+same function already ran with the same arguments on candles ending at the same timestamp.
+The cProfile hot spots are printed after the indicator table.
+"""
+
+import argparse
+import cProfile
+import inspect
+import io
+import pstats
+import time
+from collections import Counter, defaultdict
+
+import jesse.indicators as ta
+import numpy as np
+from candle_store import CandleStore
+from run_strat import backtest, load_candles, load_strategy, parse_window
+
+
+class IndicatorCounter:
+    """Counts calls/time per indicator while installed - only top-level calls, not indicators calling indicators"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.seconds = defaultdict(float)
+        self.duplicate_calls = Counter()
+        self.duplicate_seconds = defaultdict(float)
+        self._seen = set()
+        self._depth = 0
+        self._originals = {}
+
+    def _key(self, name: str, args: tuple, kwargs: dict) -> tuple:
+        candles, rest = (args[0], args[1:]) if args else (None, ())
+        last = (
+            (len(candles), float(candles[-1][0]))
+            if isinstance(candles, np.ndarray) and len(candles)
+            else None
+        )
+        return name, last, repr(rest), repr(sorted(kwargs.items()))
+
+    def _wrap(self, name: str, func):
+        def counted(*args, **kwargs):
+            if self._depth:
+                return func(*args, **kwargs)
+            key = self._key(name, args, kwargs)
+            self._depth += 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._depth -= 1
+                self.calls[name] += 1
+                self.seconds[name] += elapsed
+                if key in self._seen:
+                    self.duplicate_calls[name] += 1
+                    self.duplicate_seconds[name] += elapsed
+                else:
+                    self._seen.add(key)
+
+        return counted
+
+    def __enter__(self) -> "IndicatorCounter":
+        for name, func in vars(ta).items():
+            if inspect.isfunction(func) and not name.startswith("_"):
+                self._originals[name] = func
+                setattr(ta, name, self._wrap(name, func))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for name, func in self._originals.items():
+            setattr(ta, name, func)
+        self._originals.clear()
+
+    def format_table(self, total_seconds: float, candles: int) -> str:
+        lines = [
+            f"{'indicator':<16} {'calls':>9} {'per candle':>10} {'seconds':>9}"
+            f" {'dup calls':>10} {'dup seconds':>11}"
+        ]
+        for name, seconds in sorted(self.seconds.items(), key=lambda x: -x[1]):
+            lines.append(
+                f"{name:<16} {self.calls[name]:>9} {self.calls[name] / candles:>10.2f}"
+                f" {seconds:>9.2f} {self.duplicate_calls[name]:>10}"
+                f" {self.duplicate_seconds[name]:>11.2f}"
+            )
+        spent = sum(self.seconds.values())
+        duplicate = sum(self.duplicate_seconds.values())
+        lines.append(
+            f"Indicators: {spent:.2f}s of {total_seconds:.2f}s ({spent / total_seconds:.0%}),"
+            f" duplicate work: {duplicate:.2f}s ({duplicate / total_seconds:.0%})"
+        )
+        return "\n".join(lines)
+
+
+def profile(strategy: str, ticker: str, window: tuple[int, int], top: int = 20) -> str:
+    candles = load_candles(CandleStore(), ticker.upper(), *window)
+    if not len(candles):
+        return f"No candles for {ticker}"
+    strategy_type = load_strategy(strategy)
+    profiler = cProfile.Profile()
+    with IndicatorCounter() as counter:
+        started = time.perf_counter()
+        profiler.runcall(backtest, strategy_type, ticker.upper(), candles)
+        elapsed = time.perf_counter() - started
+
+    hot_spots = io.StringIO()
+    pstats.Stats(profiler, stream=hot_spots).sort_stats("cumulative").print_stats(top)
+    return "\n".join(
+        [
+            f"{strategy} on {ticker.upper()}: {len(candles)} candles in {elapsed:.2f}s",
+            counter.format_table(elapsed, len(candles)),
+            hot_spots.getvalue(),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Profile a jesse backtest's indicator work"
+    )
+    parser.add_argument("strategy")
+    parser.add_argument("ticker")
+    parser.add_argument(
+        "window", type=parse_window, help="start:end, as dates or epoch ms"
+    )
+    parser.add_argument("--top", type=int, default=20, help="cProfile rows to print")
+    args = parser.parse_args()
+
+    print(profile(args.strategy, args.ticker, args.window, args.top))
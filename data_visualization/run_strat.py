@@ -1,41 +1,279 @@
+"""
+Backtests every (strategy, ticker, date window) combination in one go:
+
+    python run_strat.py
+    python run_strat.py --strategies SimpleDonchian SwingTraderV1 --tickers stock_lists/mag7.json
+    python run_strat.py --tickers AAPL TSLA --windows 2024-01-02:2024-06-28 2024-07-01:2024-10-04
+
+- Each (ticker, window) is loaded ONCE - from the local candle store (see import_candles.py),
+  or from Postgres if the store doesn't have it, in which case it gets saved to the store too -
+  and written to a tmpfs cache every worker memory-maps, so jobs never hit the database
+- The `_isolated_backtest` jobs are spread over a process pool, only names and a path get sent
+- Results come back as one table, a row per job
+Strategies are looked up by folder name in strategies/, so user strategies work the same way.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import product
+from typing import Optional
+
 import jesse.helpers as jh
-from jesse.modes.backtest_mode import _step_simulator
+import numpy as np
+from candle_store import JESSE_COLUMN_ORDER, CandleStore, to_epoch_ms
 from jesse.research.backtest import _isolated_backtest
 from jesse.services.candle import _get_candles_from_db
-from strategies.SimpleDonchian import SimpleDonchian
-
-# ticker and dates u wanna backtest
-ticker = "AAPL"
-start_date = 1704205800000  # "2024-01-02"
-end_date = 1728071940000  # "2024-10-04"
+from loguru import logger
 
-db_candles = _get_candles_from_db("NYSE", f"NYSE-{ticker}", start_date, end_date)
-config = {
+STRATEGIES = ["SimpleDonchian", "SwingTraderV1"]
+TICKERS = ["AAPL"]
+# (start, end) epoch ms
+WINDOWS = [(1704205800000, 1728071940000)]  # 2024-01-02 -> 2024-10-04
+EXCHANGE = "NYSE"
+CONFIG = {
     "starting_balance": 10_000,
     "fee": 0,
     "type": "futures",
     "futures_leverage": 2,
     "futures_leverage_mode": "cross",
-    "exchange": "NYSE",
+    "exchange": EXCHANGE,
     "warm_up_candles": 0,
 }
-routes = [
-    {
-        "exchange": "NYSE",
-        "strategy": SimpleDonchian,
-        "symbol": f"NYSE-{ticker}",
-        "timeframe": "1m",
-    },
-]
-data_routes = []
-candles = {
-    jh.key("NYSE", f"NYSE-{ticker}"): {
-        "exchange": "NYSE",
-        "symbol": f"NYSE-{ticker}",
-        "candles": db_candles,
-    },
-}
+# Which of jesse's metrics make it into the results table
+METRICS = (
+    "total",
+    "win_rate",
+    "net_profit_percentage",
+    "max_drawdown",
+    "sharpe_ratio",
+)
+
+# Per-worker state, set once by `_init_worker`
+_worker_state: dict = {}
+
+
+def load_tickers(source: str | list[str]) -> list[str]:
+    """A list of tickers or a `stock_lists/*.json` file ({"tickers": [...]})"""
+    if isinstance(source, str):
+        with open(source) as f:
+            source = json.load(f)["tickers"]
+    return list(dict.fromkeys(ticker.upper() for ticker in source))
+
+
+def load_strategy(name: str) -> type:
+    """jesse's layout - strategies/<Name>/__init__.py defines a class called <Name>"""
+    return getattr(importlib.import_module(f"strategies.{name}"), name)
+
+
+def symbol(ticker: str) -> str:
+    return f"{EXCHANGE}-{ticker}"
+
+
+def load_candles(store: CandleStore, ticker: str, start: int, end: int) -> np.ndarray:
+    """(n, 6) jesse candles, from the store or (once) from Postgres"""
+    candles = store.jesse_candles(ticker, start, end)
+    if len(candles):
+        return candles
+    logger.info(f"No local candles for {ticker}, loading them from the database")
+    candles = np.asarray(_get_candles_from_db(EXCHANGE, symbol(ticker), start, end))
+    if len(candles):
+        # Next run reads them from the store
+        store.append(
+            ticker,
+            {name: candles[:, i] for i, name in enumerate(JESSE_COLUMN_ORDER)},
+        )
+    return candles
+
+
+class CandleCache:
+    """Every (ticker, window) as a .npy in tmpfs (`/dev/shm` when available) for the workers to memmap"""
+
+    def __init__(self, store: CandleStore, tickers: list[str], windows: list[tuple]):
+        shm_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self.folder = tempfile.mkdtemp(prefix="rh_jesse_", dir=shm_root)
+        self.paths: dict[tuple[str, int, int], str] = {}
+        for ticker, (start, end) in product(tickers, windows):
+            candles = load_candles(store, ticker, start, end)
+            if not len(candles):
+                logger.warning(f"No candles for {ticker} {start} -> {end}, skipping")
+                continue
+            path = os.path.join(self.folder, f"{ticker}.{start}.{end}.npy")
+            np.save(path, np.ascontiguousarray(candles, dtype=np.float64))
+            self.paths[(ticker, start, end)] = path
+
+    def close(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def __enter__(self) -> "CandleCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _init_worker(paths: dict[tuple[str, int, int], str], config: dict) -> None:
+    _worker_state["paths"] = paths
+    _worker_state["config"] = config
+
+
+def backtest(
+    strategy: type, ticker: str, candles: np.ndarray, config: dict = CONFIG
+) -> dict:
+    """One `_isolated_backtest` of a strategy class over (n, 6) jesse candles"""
+    routes = [
+        {
+            "exchange": EXCHANGE,
+            "strategy": strategy,
+            "symbol": symbol(ticker),
+            "timeframe": "1m",
+        },
+    ]
+    candles = {
+        jh.key(EXCHANGE, symbol(ticker)): {
+            "exchange": EXCHANGE,
+            "symbol": symbol(ticker),
+            "candles": candles,
+        },
+    }
+    return _isolated_backtest(config, routes, [], candles)
+
+
+def _run_job(job: tuple[str, str, int, int]) -> dict:
+    strategy, ticker, start, end = job
+    # Copy-on-write: jesse can't touch the shared file, and nothing is copied unless it writes
+    candles = np.load(_worker_state["paths"][(ticker, start, end)], mmap_mode="c")
+    started = time.perf_counter()
+    result = backtest(load_strategy(strategy), ticker, candles, _worker_state["config"])
+    metrics = result.get("metrics") or {}
+    return {
+        **{name: metrics.get(name) for name in METRICS},
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def run_batch(
+    strategies: list[str] = STRATEGIES,
+    tickers: str | list[str] = TICKERS,
+    windows: list[tuple[int, int]] = WINDOWS,
+    workers: Optional[int] = None,
+    config: dict = CONFIG,
+    store: Optional[CandleStore] = None,
+) -> list[dict]:
+    """
+    One row per (strategy, ticker, window) - strategy/ticker/start/end + `METRICS` + how long it took.
+    A job that blows up gets its error in the row instead of taking the batch down.
+    - workers: defaults to every core on the box
+    """
+    tickers = load_tickers(tickers)
+    for name in strategies:
+        load_strategy(name)  # a typo should fail now, not in every worker
+    started = time.perf_counter()
+    rows = []
+    with CandleCache(store or CandleStore(), tickers, windows) as cache:
+        jobs = [
+            (strategy, ticker, start, end)
+            for strategy, (ticker, start, end) in product(strategies, cache.paths)
+        ]
+        logger.info(
+            f"{len(jobs)} backtests ({len(strategies)} strategies x {len(cache.paths)}"
+            f" candle ranges), candles loaded in {time.perf_counter() - started:.1f}s"
+        )
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(cache.paths, config),
+        ) as pool:
+            pending = {pool.submit(_run_job, job): job for job in jobs}
+            for future in as_completed(pending):
+                strategy, ticker, start, end = pending[future]
+                row = {
+                    "strategy": strategy,
+                    "ticker": ticker,
+                    "start": start,
+                    "end": end,
+                }
+                try:
+                    row |= future.result()
+                except Exception as e:
+                    logger.error(f"{strategy} on {ticker} failed: {e}")
+                    row["error"] = str(e)
+                rows.append(row)
+
+    logger.info(f"Batch done in {time.perf_counter() - started:.1f}s")
+    rows.sort(key=lambda r: (r["strategy"], r["ticker"], r["start"]))
+    return rows
+
+
+def _day(epoch_ms: int) -> str:
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+def format_table(rows: list[dict]) -> str:
+    def cell(value) -> str:
+        if value is None:
+            return "-"
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    header = ["strategy", "ticker", "window", *METRICS, "seconds"]
+    table = [
+        [
+            row["strategy"],
+            row["ticker"],
+            f"{_day(row['start'])} -> {_day(row['end'])}",
+            *(
+                ("error: " + row["error"],) + ("",) * (len(METRICS))
+                if "error" in row
+                else (cell(row.get(name)) for name in (*METRICS, "seconds"))
+            ),
+        ]
+        for row in rows
+    ]
+    widths = [
+        max(len(str(line[i])) for line in [header, *table]) for i in range(len(header))
+    ]
+    return "\n".join(
+        "  ".join(
+            str(value).ljust(width) for value, width in zip(line, widths)
+        ).rstrip()
+        for line in [header, *table]
+    )
+
+
+def parse_window(window: str) -> tuple[int, int]:
+    """YYYY-MM-DD:YYYY-MM-DD (end day included) or start_ms:end_ms"""
+    start, end = window.split(":")
+    start = int(start) if start.isdigit() else start
+    end = int(end) if end.isdigit() else end
+    return to_epoch_ms(start), to_epoch_ms(end, end_of_day=True)
+
 
-_isolated_backtest(config, routes, data_routes, candles)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backtest strategies x tickers x windows"
+    )
+    parser.add_argument("--strategies", nargs="+", default=STRATEGIES)
+    parser.add_argument(
+        "--tickers",
+        nargs="+",
+        default=TICKERS,
+        help="tickers or a stock_lists json file",
+    )
+    parser.add_argument(
+        "--windows",
+        nargs="+",
+        type=parse_window,
+        default=WINDOWS,
+        help="start:end, as dates or epoch ms",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
 
-_step_simulator
+    source = args.tickers[0] if args.tickers[0].endswith(".json") else args.tickers
+    print(format_table(run_batch(args.strategies, source, args.windows, args.workers)))
@@ -8,16 +8,18 @@ prices closes below the lowerband.
 
 import jesse.indicators as ta
 from jesse import utils
-from jesse.strategies import Strategy
+from jesse.strategies import Strategy, cached
 
 
 class SimpleDonchian(Strategy):
     @property
+    @cached
     def donchian(self):
         # Previous Donchian Channels with default parameters
         return ta.donchian(self.candles[:-1])
 
     @property
+    @cached
     def ma_trend(self):
         return ta.sma(self.candles, period=200)
 
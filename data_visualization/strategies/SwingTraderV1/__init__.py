@@ -4,11 +4,19 @@ from jesse.strategies import Strategy, cached
 
 
 class SwingTraderV1(Strategy):
+    # Indicators are @cached - computed once per candle however many hooks ask for them
     @property
+    @cached
     def adx(self):
         return ta.adx(self.candles) > 25
 
     @property
+    @cached
+    def atr(self):
+        return ta.atr(self.candles)
+
+    @property
+    @cached
     def trend(self):
         e1 = ta.ema(self.candles, 21)
         e2 = ta.ema(self.candles, 50)
@@ -25,7 +33,7 @@ class SwingTraderV1(Strategy):
 
     def go_long(self):
         entry = self.price
-        stop = entry - ta.atr(self.candles) * 2
+        stop = entry - self.atr * 2
         qty = (
             utils.risk_to_qty(
                 self.available_margin, 5, entry, stop, fee_rate=self.fee_rate
@@ -39,7 +47,7 @@ class SwingTraderV1(Strategy):
 
     def go_short(self):
         entry = self.price
-        stop = entry + ta.atr(self.candles) * 2
+        stop = entry + self.atr * 2
         qty = (
             utils.risk_to_qty(
                 self.available_margin, 5, entry, stop, fee_rate=self.fee_rate
@@ -53,16 +61,16 @@ class SwingTraderV1(Strategy):
 
     def on_open_position(self, order) -> None:
         if self.is_long:
-            self.stop_loss = self.position.qty, self.price - ta.atr(self.candles) * 2
+            self.stop_loss = self.position.qty, self.price - self.atr * 2
             self.take_profit = (
                 self.position.qty / 2,
-                self.price + ta.atr(self.candles) * 3,
+                self.price + self.atr * 3,
             )
         elif self.is_short:
-            self.stop_loss = self.position.qty, self.price + ta.atr(self.candles) * 2
+            self.stop_loss = self.position.qty, self.price + self.atr * 2
             self.take_profit = (
                 self.position.qty / 2,
-                self.price - ta.atr(self.candles) * 3,
+                self.price - self.atr * 3,
             )
 
     def on_reduced_position(self, order) -> None:
@@ -76,14 +84,10 @@ class SwingTraderV1(Strategy):
             if self.is_long:
                 self.stop_loss = (
                     self.position.qty,
-                    max(
-                        self.price - ta.atr(self.candles) * 2, self.position.entry_price
-                    ),
+                    max(self.price - self.atr * 2, self.position.entry_price),
                 )
             elif self.is_short:
                 self.stop_loss = (
                     self.position.qty,
-                    min(
-                        self.price + ta.atr(self.candles) * 2, self.position.entry_price
-                    ),
+                    min(self.price + self.atr * 2, self.position.entry_price),
                 )
@@ -2,3 +2,9 @@ class NoStrikePriceError(Exception):
     def __init__(self, message):
         self.message = message
         super().__init__(self.message)
+
+
+class OrderNotFilledError(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
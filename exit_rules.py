@@ -0,0 +1,162 @@
+"""
+Exit rules for open positions, the same ones live (`main.py`) and in the backtester:
+- Hard stop: sell if the price drops `hard_stop` (20%) below the entry
+- Trailing stop: once it's been in profit, sell if it drops `trailing_stop` (5%) from the highest price since entry
+- Deadline: sell no matter what at `exit_time` (3:30pm ET) on the day it was bought
+
+Each position only keeps entry, peak, its stop levels and the deadline, so a price update is
+a couple of comparisons no matter how many positions are open. Triggered rules come out as
+`SellIntent`s - placing the order is up to the caller.
+"""
+
+import time as _time
+from dataclasses import dataclass
+from datetime import datetime, time, timezone
+from typing import Hashable, Optional
+from zoneinfo import ZoneInfo
+
+from models import ExitReason
+
+EASTERN = ZoneInfo("America/New_York")
+HARD_STOP = 0.20
+TRAILING_STOP = 0.05
+EXIT_TIME = time(15, 30)  # Eastern
+SECONDS_PER_DAY = 86_400
+
+
+@dataclass(frozen=True)
+class ExitRules:
+    hard_stop: float = HARD_STOP
+    trailing_stop: float = TRAILING_STOP
+    exit_time: time = EXIT_TIME
+    take_profit: Optional[float] = None  # off unless set
+
+
+# What live trading (main.py) and back_test both exit with, so simulated exits match live ones
+EXIT_RULES = ExitRules()
+
+
+@dataclass
+class SellIntent:
+    position_id: Hashable
+    reason: ExitReason
+    price: float  # the price that triggered it
+    at: float  # epoch seconds
+    entry_price: float
+    peak_price: float
+
+    @property
+    def profit_pct(self) -> float:
+        return (self.price - self.entry_price) / self.entry_price
+
+
+class _PositionState:
+    __slots__ = (
+        "entry",
+        "peak",
+        "last",
+        "hard_stop_price",
+        "trail_price",
+        "take_profit_price",
+        "deadline",
+    )
+
+    def __init__(self, entry: float, deadline: float, rules: ExitRules):
+        self.entry = entry
+        self.peak = entry
+        self.last = entry
+        self.hard_stop_price = entry * (1 - rules.hard_stop)
+        self.trail_price = 0.0  # armed once the price goes above the entry
+        self.deadline = deadline
+        self.take_profit_price = (
+            entry * (1 + rules.take_profit) if rules.take_profit else float("inf")
+        )
+
+
+class ExitEngine:
+    def __init__(self, rules: ExitRules = EXIT_RULES):
+        self.rules = rules
+        self.positions: dict[Hashable, _PositionState] = {}
+        # UTC day -> deadline, US sessions never cross midnight UTC
+        self._deadlines: dict[int, float] = {}
+
+    def deadline_for(self, now: float) -> float:
+        """Epoch seconds of `exit_time` ET on the trading day `now` (epoch seconds) falls on"""
+        day = int(now // SECONDS_PER_DAY)
+        if (deadline := self._deadlines.get(day)) is None:
+            date = datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).date()
+            deadline = datetime.combine(
+                date, self.rules.exit_time, tzinfo=EASTERN
+            ).timestamp()
+            self._deadlines[day] = deadline
+        return deadline
+
+    def past_deadline(self, now: Optional[float] = None) -> bool:
+        now = _time.time() if now is None else now
+        return now >= self.deadline_for(now)
+
+    def open(
+        self, position_id: Hashable, entry_price: float, now: Optional[float] = None
+    ) -> None:
+        now = _time.time() if now is None else now
+        self.positions[position_id] = _PositionState(
+            float(entry_price), self.deadline_for(now), self.rules
+        )
+
+    def close(self, position_id: Hashable) -> None:
+        self.positions.pop(position_id, None)
+
+    def update(
+        self, position_id: Hashable, price: float, now: Optional[float] = None
+    ) -> Optional[SellIntent]:
+        """Feeds one price to one position. A triggered position is closed in the engine right away."""
+        state = self.positions.get(position_id)
+        if state is None:
+            return None
+        now = _time.time() if now is None else now
+        price = state.last = float(price)
+        if price > state.peak:
+            state.peak = price
+            if price > state.entry:
+                state.trail_price = price * (1 - self.rules.trailing_stop)
+
+        if price <= state.hard_stop_price or price <= state.trail_price:
+            reason = (
+                ExitReason.trailing_stop
+                if state.trail_price > state.hard_stop_price
+                else ExitReason.stop_loss
+            )
+        elif price >= state.take_profit_price:
+            reason = ExitReason.take_profit
+        elif now >= state.deadline:
+            reason = ExitReason.deadline
+        else:
+            return None
+        del self.positions[position_id]
+        return SellIntent(position_id, reason, price, now, state.entry, state.peak)
+
+    def update_many(
+        self, prices: dict[Hashable, float], now: Optional[float] = None
+    ) -> list[SellIntent]:
+        """One price per position (positions without a new price only get the deadline check)"""
+        now = _time.time() if now is None else now
+        intents = []
+        for position_id in list(self.positions):
+            state = self.positions[position_id]
+            if (price := prices.get(position_id)) is not None:
+                intent = self.update(position_id, price, now)
+            elif now >= state.deadline:
+                del self.positions[position_id]
+                intent = SellIntent(
+                    position_id,
+                    ExitReason.deadline,
+                    state.last,
+                    now,
+                    state.entry,
+                    state.peak,
+                )
+            else:
+                intent = None
+            if intent:
+                intents.append(intent)
+        return intents
@@ -0,0 +1,173 @@
+"""
+Tracks submitted option orders until they fill, for all pending orders at once.
+- One open-orders fetch per poll no matter how many orders are pending
+- Each order resolves its own Future (the filled order info, or OrderNotFilledError)
+- Polling backs off while nothing changes and snaps back when something does
+- Orders are never re-submitted: a dead/timed-out order only gets replaced if a
+  `reprice` callback is given and returns a new order
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from loguru import logger
+
+from broker import r
+from exceptions import OrderNotFilledError
+
+FILLED_STATES = {"filled"}
+DEAD_STATES = {"cancelled", "rejected", "failed", "expired"}
+
+# Given the dead order's info, place a replacement (e.g. at a better price) and return it
+# or return None to give up on the order
+RepriceCallback = Callable[[dict], Optional[dict]]
+
+
+@dataclass
+class PendingOrder:
+    order: dict
+    future: Future
+    timeout: Optional[float]
+    deadline: Optional[float]
+    reprice: Optional[RepriceCallback]
+    reprices_left: int
+    cancel_requested: bool = False
+
+
+class FillTracker:
+    def __init__(
+        self,
+        min_interval: float = 0.5,
+        max_interval: float = 8.0,
+        backoff: float = 2.0,
+        max_reprices: int = 3,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_reprices = max_reprices
+        self.pending: dict[str, PendingOrder] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(
+        self,
+        order: dict,
+        timeout: Optional[float] = None,
+        reprice: Optional[RepriceCallback] = None,
+    ) -> Future:
+        """
+        Starts tracking an already-submitted order and returns a Future for its fill.
+        - timeout: seconds to wait for the fill before the order gets cancelled
+        - reprice: called when the order dies (cancelled, rejected, timed out)
+        """
+        future = Future()
+        if not order or "id" not in order:
+            future.set_exception(
+                OrderNotFilledError(f"Order was not accepted: {order}")
+            )
+            return future
+        with self._lock:
+            self.pending[order["id"]] = PendingOrder(
+                order=order,
+                future=future,
+                timeout=timeout,
+                deadline=time.monotonic() + timeout if timeout else None,
+                reprice=reprice,
+                reprices_left=self.max_reprices,
+            )
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="fill-tracker", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+        return future
+
+    def poll(self) -> int:
+        """One polling cycle for every pending order. Returns how many orders changed."""
+        with self._lock:
+            pending = list(self.pending.values())
+        if not pending:
+            return 0
+
+        open_orders = {order["id"] for order in r.orders.get_all_open_option_orders()}
+        changed = 0
+        for tracked in pending:
+            order_id = tracked.order["id"]
+            if order_id in open_orders:
+                if (
+                    tracked.deadline
+                    and time.monotonic() >= tracked.deadline
+                    and not tracked.cancel_requested
+                ):
+                    logger.info(f"Order {order_id} timed out - cancelling")
+                    r.orders.cancel_option_order(order_id)
+                    tracked.cancel_requested = True
+                continue
+
+            # Not open anymore, so it's in its final state - one lookup per order lifetime
+            info = r.orders.get_option_order_info(order_id) or {}
+            state = info.get("state")
+            if state not in FILLED_STATES | DEAD_STATES:
+                continue  # just submitted, not showing up in the open orders yet
+            changed += 1
+            with self._lock:
+                del self.pending[order_id]
+            if state in FILLED_STATES:
+                logger.info(f"Order {order_id} filled")
+                tracked.future.set_result(info)
+            else:
+                self._on_dead_order(tracked, info)
+        return changed
+
+    def _on_dead_order(self, tracked: PendingOrder, info: dict) -> None:
+        order_id = tracked.order["id"]
+        replacement = None
+        if tracked.reprice and tracked.reprices_left > 0:
+            logger.info(f"Order {order_id} {info.get('state')} - repricing")
+            replacement = tracked.reprice(info)
+        if not replacement or "id" not in replacement:
+            tracked.future.set_exception(
+                OrderNotFilledError(f"Order {order_id} was {info.get('state')}")
+            )
+            return
+        with self._lock:
+            self.pending[replacement["id"]] = PendingOrder(
+                order=replacement,
+                future=tracked.future,
+                timeout=tracked.timeout,
+                deadline=time.monotonic() + tracked.timeout
+                if tracked.timeout
+                else None,
+                reprice=tracked.reprice,
+                reprices_left=tracked.reprices_left - 1,
+            )
+
+    def _run(self) -> None:
+        interval = self.min_interval
+        while True:
+            if self._wake.wait(timeout=interval):
+                interval = self.min_interval  # new order came in
+            self._wake.clear()
+            with self._lock:
+                if not self.pending:
+                    self._thread = None
+                    return
+            try:
+                changed = self.poll()
+            except Exception as e:
+                logger.warning(f"Fill tracker poll failed: {e}")
+                changed = 0
+            if changed:
+                interval = self.min_interval
+            else:
+                interval = min(interval * self.backoff, self.max_interval)
+
+
+# Shared by everything placing orders in this process so they all ride the same poll
+fill_tracker = FillTracker()
@@ -1,16 +1,26 @@
 # Orchestrate operations here
+import asyncio
 import time
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
 
 from loguru import logger
 
+from exit_rules import EXIT_RULES, ExitEngine
+from models import Action, ExitReason
 from trading_strategies import Strategy
 from trading_strategies.moving_averages import MovingAverageStrategy
-from utils import at_stop_loss, log_in
+from utils import current_stock_price, log_in
 
 # Parameters
 TICKER = "AAPL"
-STOP_LOSS_PERCENTAGE = 0.15
+# Exits (20% hard stop + 5% trailing stop + sell everything at 3:30pm ET) come from
+# exit_rules.EXIT_RULES, the same rules back_test uses
+POLL_INTERVAL_SECONDS = 10
+# robin_stocks is blocking, so its calls (and strategy evaluation) run on a bounded thread pool
+MAX_SDK_THREADS = 8
 
 
 # Might have to encapsulate this in a function so we can backtest it without running the whole thing, especially the time.sleep(10) part
@@ -18,37 +28,93 @@ STOP_LOSS_PERCENTAGE = 0.15
 # but I would prefer to have a single function that can be both tested and run live
 def main(strat: Strategy) -> None:
     log_in()
-    position = None
-    while True:
+    session = TickerSession(TICKER, strat)
+    while not session.closed:
         # Get our data. We need things like historical prices, current price, etc.
         # Anything that our strategy needs to make decisions. OR our strategy could do that on it's own
         # But I'm trying to not have the strategy know about which ticker it's trading or it's current position.
         # That's handled by this loop... I think
-        if datetime.now(timezone.utc) >= "20:30":
-            logger.info("Selling")
-            # sell_option_limit_order
-            break
-        if position:
-            if at_stop_loss(position, current_price, STOP_LOSS_PERCENTAGE):
-                logger.info(f"Selling because of stop loss at {STOP_LOSS_PERCENTAGE}")
-                # sell_option_limit_order
-                break
-            if strat.should_sell():
-                logger.info("Selling because of strategy signal")
-                # sell_option_limit_order
-                break
-            else:
-                logger.info("Waiting for a signal to sell")
-                continue
+        step(session, current_stock_price(TICKER))
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+@dataclass
+class TickerSession:
+    ticker: str
+    strat: Strategy
+    position: dict | None = None
+    closed: bool = False
+    exits: ExitEngine = field(default_factory=lambda: ExitEngine(EXIT_RULES))
+
+
+def step(
+    session: TickerSession, current_price: Decimal, now: Optional[float] = None
+) -> Action:
+    """One tick of the trading loop for a single (ticker, strategy) pair"""
+    session.strat.update(float(current_price))
+    if session.position:
+        # Stops and the 3:30pm exit come first, then the strategy's own signal
+        if intent := session.exits.update(session.ticker, current_price, now):
+            reason = intent.reason
+        elif session.strat.should_sell():
+            session.exits.close(session.ticker)
+            reason = ExitReason.signal
         else:
-            if strat.should_buy():
-                logger.info("Buying because of strategy signal")
-                # buy_option_limit_order
-                position = {"entry_price": current_price}
-                continue
-            else:
-                logger.info("Waiting for a signal to buy")
-        time.sleep(10)
+            logger.info(f"{session.ticker} - Waiting for a signal to sell")
+            return Action.wait
+        logger.info(f"{session.ticker} - Selling because of {reason.value}")
+        # sell_option_limit_order
+        session.closed = True
+        return Action.sell
+    if session.exits.past_deadline(now):
+        logger.info(f"{session.ticker} - Past the exit time, not buying anymore today")
+        session.closed = True
+        return Action.wait
+    if session.strat.should_buy():
+        logger.info(f"{session.ticker} - Buying because of strategy signal")
+        # buy_option_limit_order
+        session.position = {"entry_price": current_price}
+        session.exits.open(session.ticker, current_price, now)
+        return Action.buy
+    logger.info(f"{session.ticker} - Waiting for a signal to buy")
+    return Action.wait
+
+
+def latest_prices(tickers: list[str]) -> dict[str, Decimal]:
+    """One batched quote request for every ticker we're watching"""
+    prices = current_stock_price(tickers)
+    if not isinstance(prices, list):
+        prices = [prices]
+    return dict(zip(tickers, prices))
+
+
+async def main_many(
+    pairs: list[tuple[str, Strategy]],
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+    max_threads: int = MAX_SDK_THREADS,
+) -> None:
+    """
+    Runs many (ticker, Strategy) pairs from one process and one login.
+    Every cycle does a single quote request for all tickers and then evaluates
+    every strategy concurrently, so adding tickers doesn't add round trips.
+    """
+    loop = asyncio.get_running_loop()
+    sessions = [TickerSession(ticker.upper(), strat) for ticker, strat in pairs]
+    with ThreadPoolExecutor(max_workers=max_threads) as pool:
+        await loop.run_in_executor(pool, log_in)
+        while active := [session for session in sessions if not session.closed]:
+            cycle_started = loop.time()
+            tickers = list(dict.fromkeys(session.ticker for session in active))
+            prices = await loop.run_in_executor(pool, latest_prices, tickers)
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, step, session, prices[session.ticker])
+                    for session in active
+                )
+            )
+            # Sleep whatever is left of the interval so the tick rate doesn't drift with load
+            elapsed = loop.time() - cycle_started
+            await asyncio.sleep(max(0.0, poll_interval - elapsed))
 
 
 if __name__ == "__main__":
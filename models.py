@@ -33,3 +33,18 @@ class Bounds(str, Enum):
     regular = "regular"
     trading = "trading"
     extended = "extended"
+
+
+class ExitReason(str, Enum):
+    stop_loss = "stop_loss"
+    trailing_stop = "trailing_stop"
+    take_profit = "take_profit"
+    deadline = "deadline"
+    signal = "signal"  # the strategy's own should_sell
+
+
+class RequestPriority(int, Enum):
+    # Lower goes first
+    order = 0  # placing/cancelling orders and checking their fills
+    monitor = 1  # quotes for open positions
+    scan = 2  # universe scans - only gets what the other two leave
@@ -0,0 +1,90 @@
+"""
+Signal math on float64 NumPy arrays - one array op per series instead of a `Decimal` per element.
+`Decimal` is reserved for money (`money()`), unless exact mode is switched on:
+
+    EXACT_DECIMAL_MATH=1 python main.py    # or set_exact_math(True)
+
+In exact mode mean/std/deltas/chunked sums are computed with `Decimal` from the shortest repr of
+each float, which is the exact price string the API sent (prices have < 15 significant digits).
+"""
+
+import os
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
+
+import numpy as np
+
+CENT = Decimal("0.01")
+
+_exact = os.getenv("EXACT_DECIMAL_MATH", "").lower() in ("1", "true", "yes")
+
+
+def set_exact_math(enabled: bool) -> None:
+    global _exact
+    _exact = enabled
+
+
+def is_exact_math() -> bool:
+    return _exact
+
+
+def as_array(values: Iterable) -> np.ndarray:
+    """float64 view of prices/deltas - Decimals and API strings included"""
+    if isinstance(values, np.ndarray) and values.dtype == np.float64:
+        return values
+    if not hasattr(values, "__len__"):
+        values = list(values)  # generators
+    return np.asarray(values, dtype=np.float64)
+
+
+def to_decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(repr(float(value)))
+
+
+def money(value) -> Decimal:
+    """Rounds to the cent - use it for anything that ends up in an order"""
+    return to_decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def mean(values) -> float | Decimal:
+    if _exact:
+        exact = [to_decimal(v) for v in values]
+        return sum(exact) / len(exact)
+    return float(as_array(values).mean())
+
+
+def std_dev(values, mean_: float | Decimal | None = None) -> float | Decimal:
+    """Population standard deviation"""
+    if _exact:
+        exact = [to_decimal(v) for v in values]
+        center = to_decimal(mean_) if mean_ is not None else sum(exact) / len(exact)
+        return (sum((v - center) ** 2 for v in exact) / len(exact)).sqrt()
+    array = as_array(values)
+    center = array.mean() if mean_ is None else float(mean_)
+    return float(np.sqrt(np.mean((array - center) ** 2)))
+
+
+def deltas(opens, closes) -> np.ndarray | list[Decimal]:
+    """Open to close move of every candle"""
+    if _exact:
+        return [to_decimal(c) - to_decimal(o) for o, c in zip(opens, closes)]
+    return as_array(closes) - as_array(opens)
+
+
+def chunked_sums(values, chunk_size: int) -> np.ndarray | list[Decimal]:
+    """Sums of consecutive `chunk_size` runs, the last one may be shorter"""
+    if not hasattr(values, "__len__"):
+        values = list(values)  # generators
+    return segment_sums(values, np.arange(0, len(values), chunk_size))
+
+
+def segment_sums(values, starts) -> np.ndarray | list[Decimal]:
+    """Sums of `values[starts[i]:starts[i + 1]]`, the last segment runs to the end"""
+    if _exact:
+        exact = [to_decimal(v) for v in values]
+        bounds = [int(start) for start in starts] + [len(exact)]
+        return [sum(exact[a:b], Decimal(0)) for a, b in zip(bounds, bounds[1:])]
+    array = as_array(values)
+    if not len(array):
+        return array
+    return np.add.reduceat(array, starts)
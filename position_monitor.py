@@ -0,0 +1,145 @@
+"""
+Watches every open option leg in the process at once.
+- One batched market data request per cycle no matter how many legs are open
+- Take-profit/stop-loss are checked for every leg in the same cycle
+- Each leg resolves its own Future with the `TriggeredExit` - placing the sell is up to the caller
+"""
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from decimal import Decimal
+
+from loguru import logger
+
+from broker import r
+
+
+@dataclass
+class WatchedLeg:
+    option: dict
+    entry_value: Decimal
+    take_profit: Decimal
+    stop_loss: Decimal
+    poll_interval: float
+    future: Future
+
+
+@dataclass
+class TriggeredExit:
+    option: dict
+    reason: str  # "take_profit" | "stop_loss"
+    value: Decimal  # the value it triggered at, i.e. the limit price to sell at
+    profit_pct: Decimal
+
+
+def option_value(quote: dict) -> Decimal:
+    # Halfway between the mark and the ask
+    return (Decimal(quote["adjusted_mark_price"]) + Decimal(quote["ask_price"])) / 2
+
+
+def _quote_option_id(quote: dict) -> str:
+    return (
+        quote.get("instrument_id") or quote["instrument"].rstrip("/").rsplit("/", 1)[-1]
+    )
+
+
+class PositionMonitor:
+    def __init__(self, poll_interval: float = 2):
+        self.poll_interval = poll_interval
+        self.legs: dict[str, WatchedLeg] = {}  # option id -> leg
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def watch(
+        self,
+        option: dict,
+        take_profit: Decimal = Decimal("0.05"),
+        stop_loss: Decimal = Decimal("0.02"),
+        poll_interval: float | None = None,
+    ) -> Future:
+        """Starts watching a leg (instrument + market data) and returns a Future for its `TriggeredExit`"""
+        future = Future()
+        leg = WatchedLeg(
+            option=option,
+            entry_value=Decimal(
+                option.get("fair_midpoint_price") or option["mark_price"]
+            ),
+            take_profit=Decimal(take_profit),
+            stop_loss=Decimal(stop_loss),
+            poll_interval=self.poll_interval
+            if poll_interval is None
+            else poll_interval,
+            future=future,
+        )
+        with self._lock:
+            if option["id"] in self.legs:
+                raise ValueError(f"Option {option['id']} is already being watched")
+            self.legs[option["id"]] = leg
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="position-monitor", daemon=True
+                )
+                self._thread.start()
+        self._wake.set()
+        return future
+
+    def unwatch(self, option_id: str) -> None:
+        with self._lock:
+            leg = self.legs.pop(option_id, None)
+        if leg:
+            leg.future.cancel()
+
+    def poll(self) -> int:
+        """One cycle for every watched leg. Returns how many of them triggered."""
+        with self._lock:
+            legs = dict(self.legs)
+        if not legs:
+            return 0
+
+        quotes = r.options.get_option_market_data_by_ids(list(legs))
+        triggered = 0
+        for quote in quotes:
+            leg = legs.get(_quote_option_id(quote))
+            if not leg:
+                continue
+            value = option_value(quote)
+            profit_pct = (value - leg.entry_value) / leg.entry_value
+            logger.info(
+                f"{leg.option.get('chain_symbol')} {leg.option.get('strike_price')}"
+                f" {leg.option.get('type')} - Current Profit: {profit_pct * 100:.2f}%"
+            )
+            if profit_pct >= leg.take_profit:
+                reason = "take_profit"
+                logger.info("Take-profit triggered, closing positions.")
+            elif profit_pct <= -leg.stop_loss:
+                reason = "stop_loss"
+                logger.info("Stop-loss triggered, closing positions.")
+            else:
+                continue
+            with self._lock:
+                if self.legs.pop(_quote_option_id(quote), None) is None:
+                    continue  # unwatched meanwhile
+            triggered += 1
+            leg.future.set_result(TriggeredExit(leg.option, reason, value, profit_pct))
+        return triggered
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self.legs:
+                    self._thread = None
+                    return
+                interval = min(leg.poll_interval for leg in self.legs.values())
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Position monitor poll failed: {e}")
+            # A new leg wakes it up early so it gets its first check right away
+            self._wake.wait(timeout=interval)
+            self._wake.clear()
+
+
+# Shared by every strategy in the process so all open legs ride the same request
+position_monitor = PositionMonitor()
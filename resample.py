@@ -0,0 +1,134 @@
+"""
+Turns small candles (1m from the CandleStore, 5m from Robinhood) into any N-minute bars with
+one vectorized reduction per column, so every timeframe can come out of a single data pull:
+
+    bars = resample_many(candles, (5, 10, 15, 30, 60))
+    bars[15]["c"]    # 15 minute closes
+
+Buckets line up with the 9:30am ET open (DST included), so a 30 minute bar is always 9:30-10:00,
+10:00-10:30... whatever the first candle is. Pre-market candles just land in buckets before the open.
+Candles are columns like the CandleStore's - `t` (epoch ms, sorted) + any of o/h/l/c/v.
+"""
+
+from datetime import datetime, time, timezone
+
+import numpy as np
+
+from exit_rules import EASTERN, SECONDS_PER_DAY
+
+SESSION_OPEN = time(9, 30)  # Eastern
+TIMEFRAMES = (5, 10, 15, 30, 60)
+# How each column is reduced over a bucket: its first value, its last one or a ufunc over all of them
+_FIRST, _LAST = "first", "last"
+REDUCTIONS = {
+    "o": _FIRST,
+    "h": np.maximum,
+    "l": np.minimum,
+    "c": _LAST,
+    "v": np.add,
+}
+
+_session_opens: dict[int, int] = {}  # UTC day -> epoch seconds of that day's 9:30 ET
+
+
+def session_open(day: int) -> int:
+    if (opens_at := _session_opens.get(day)) is None:
+        date = datetime.fromtimestamp(day * SECONDS_PER_DAY, timezone.utc).date()
+        opens_at = int(datetime.combine(date, SESSION_OPEN, EASTERN).timestamp())
+        _session_opens[day] = opens_at
+    return opens_at
+
+
+def bucket_starts(t, minutes: int) -> np.ndarray:
+    """Epoch ms each candle's `minutes` bucket starts at"""
+    seconds = np.asarray(t, dtype=np.int64) // 1000
+    days = seconds // SECONDS_PER_DAY
+    unique_days, day_index = np.unique(days, return_inverse=True)
+    opens = np.array([session_open(int(day)) for day in unique_days], dtype=np.int64)
+    opens = opens[day_index]
+    width = minutes * 60
+    return (opens + (seconds - opens) // width * width) * 1000
+
+
+def bucket_bounds(t, minutes: int) -> np.ndarray:
+    """Index of the first candle of every bucket"""
+    return _first_of_each(bucket_starts(t, minutes))
+
+
+def _first_of_each(starts: np.ndarray) -> np.ndarray:
+    if not len(starts):
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+
+
+def resample(candles: dict, minutes: int) -> dict[str, np.ndarray]:
+    """`minutes` bars from smaller candles - the last bar is partial if its bucket isn't over yet"""
+    t = np.asarray(candles["t"], dtype=np.int64)
+    starts = bucket_starts(t, minutes)
+    bounds = _first_of_each(starts)
+    bars = {"t": starts[bounds]}
+    for column, reduction in REDUCTIONS.items():
+        if column not in candles:
+            continue
+        values = np.asarray(candles[column], dtype=np.float64)
+        if not len(bounds):
+            bars[column] = values[:0]
+        elif reduction == _FIRST:
+            bars[column] = values[bounds]
+        elif reduction == _LAST:
+            bars[column] = values[np.r_[bounds[1:], len(values)] - 1]
+        else:
+            bars[column] = reduction.reduceat(values, bounds)
+    return bars
+
+
+def resample_many(
+    candles: dict, timeframes: tuple[int, ...] = TIMEFRAMES
+) -> dict[int, dict[str, np.ndarray]]:
+    return {minutes: resample(candles, minutes) for minutes in timeframes}
+
+
+def _concat(chunks: list[dict]) -> dict[str, np.ndarray]:
+    return {column: np.concatenate([c[column] for c in chunks]) for column in chunks[0]}
+
+
+class Resampler:
+    """
+    Keeps `minutes` bars up to date as new candles arrive - only the candles of the bucket
+    that's still open are kept around and re-reduced, finished bars are never touched again.
+    """
+
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+        self._closed: list[dict] = []  # finished bars, in chunks as they came out
+        self._open: dict | None = None  # candles of the bucket still being filled
+
+    def update(self, candles: dict) -> None:
+        if not len(candles["t"]):
+            return
+        new = {
+            column: np.asarray(values, dtype=np.int64 if column == "t" else np.float64)
+            for column, values in candles.items()
+            if column == "t" or column in REDUCTIONS
+        }
+        if self._open is not None:
+            # Candles we already have (an API page that overlaps the last one) are skipped
+            keep = new["t"] > self._open["t"][-1]
+            new = _concat([self._open, {c: v[keep] for c, v in new.items()}])
+        bounds = bucket_bounds(new["t"], self.minutes)
+        last = int(bounds[-1])
+        if last:
+            finished = {column: values[:last] for column, values in new.items()}
+            self._closed.append(resample(finished, self.minutes))
+        self._open = {column: values[last:] for column, values in new.items()}
+
+    @property
+    def bars(self) -> dict[str, np.ndarray]:
+        """Every bar so far, the last one being the bucket that's still open"""
+        chunks = list(self._closed)
+        if self._open is not None:
+            chunks.append(resample(self._open, self.minutes))
+        if len(self._closed) > 1:
+            # One chunk from here on, so finished bars get concatenated once
+            self._closed = [_concat(self._closed)]
+        return _concat(chunks) if chunks else {}
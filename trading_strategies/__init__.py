@@ -1,6 +1,64 @@
-from da_no_kelly_strangle import *
-from engulfing_candle import *
-from history_repeats_itself import *
-from moving_averages import *
-from opinionated_greek import *
-from strategy import *
+"""
+Strategies are looked up by name and their module is only imported the first time one of them is asked for,
+so importing this package costs nothing (no robin_stocks, no API calls):
+
+    from trading_strategies import MovingAverageStrategy      # imports moving_averages.py only
+    strategy_type = get_strategy("MovingAverageStrategy")      # same thing, by name (i.e. from config)
+
+New strategies only need a line in `_REGISTRY` (or a `register()` call from outside the package).
+"""
+
+from importlib import import_module
+from typing import Any
+
+# name -> "module:attribute" - modules relative to this package unless they contain a dot
+_REGISTRY = {
+    "Strategy": "strategy:Strategy",
+    "StrategyTester": "strategy:StrategyTester",
+    "MovingAverageStrategy": "moving_averages:MovingAverageStrategy",
+    "MovingAverageStrategyTester": "moving_averages:MovingAverageStrategyTester",
+    "trade_strangle_without_kelly": "da_no_kelly_strangle:trade_strangle_without_kelly",
+    "scan_strangles": "strangle_scanner:scan_strangles",
+    "history_repeats_itself": "history_repeats_itself:history_repeats_itself",
+    "identify_price_changes": "history_repeats_itself:identify_price_changes",
+    "identify_price_changes_by_interval": "history_repeats_itself:identify_price_changes_by_interval",
+    "RollingSMA": "indicators:RollingSMA",
+    "EMA": "indicators:EMA",
+    "WilderRSI": "indicators:WilderRSI",
+    "IndicatorCache": "indicators:IndicatorCache",
+}
+
+
+def register(name: str, target: str | Any) -> None:
+    """`target` is either the strategy itself or a lazy "module:attribute" path"""
+    _REGISTRY[name] = target
+
+
+def available_strategies() -> list[str]:
+    return sorted(_REGISTRY)
+
+
+def get_strategy(name: str) -> Any:
+    try:
+        target = _REGISTRY[name]
+    except KeyError:
+        raise KeyError(
+            f"Unknown strategy '{name}' - available: {', '.join(available_strategies())}"
+        ) from None
+    if isinstance(target, str):
+        module_name, attribute = target.split(":")
+        if "." not in module_name:
+            module_name = f"{__name__}.{module_name}"
+        # import_module is a dict lookup once the module is in sys.modules
+        target = getattr(import_module(module_name), attribute)
+    return target
+
+
+def __getattr__(name: str) -> Any:
+    if name in _REGISTRY:
+        return get_strategy(name)
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_REGISTRY))
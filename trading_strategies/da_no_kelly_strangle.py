@@ -1,24 +1,26 @@
-# Takes ~20sec to spin up (3 API calls - could be improved?)
+# Spin-up is 2 rounds of concurrent API calls (price + call/put chains, then both quotes)
 # When and if conditions to buy are good, it buys a CALL and PUT (2 API calls)
-# Monitoring to sell is every 10sec (2 API calls)
+# Monitoring to sell is one batched market data request for both legs every 2sec (see position_monitor.py)
 # When selling, take-profit or stop-loss, it sell the CALL and PUT (2 API calls)
 
 import time
 from decimal import Decimal
 
-import robin_stocks.robinhood as r
 from loguru import logger
 
+from broker import r
 from models import OptionType
 from utils import (
     buy_option_limit_order,
     closest_friday,
     find_best_strikes,
     log_in,
-    monitor_trade_and_sell,
+    monitor_trades_and_sell,
     sell_option_limit_order,
 )
 
+HIGH_VOL_THRESHOLD = 0.5  # Adjust this threshold as needed
+
 
 # Function to buy a strangle (one call, one put)
 def buy_strangle(ticker, call_option, put_option) -> tuple[dict, dict]:
@@ -58,21 +60,22 @@ def calculate_prob_win(call_option, put_option) -> Decimal:
     return prob_win
 
 
+def average_iv(call_option, put_option) -> Decimal:
+    call_iv = Decimal(call_option["implied_volatility"])
+    put_iv = Decimal(put_option["implied_volatility"])
+    return (call_iv + put_iv) / 2
+
+
 # Main trading loop
 def trade_strangle_without_kelly(ticker) -> None:
     # Get best option strike prices for the nearest Friday
     exp_date = closest_friday()
     call_option, put_option = find_best_strikes(ticker, exp_date)
 
-    # Fetch implied volatility
-    call_iv = Decimal(call_option["implied_volatility"])
-    put_iv = Decimal(put_option["implied_volatility"])
-    avg_iv = (call_iv + put_iv) / 2
+    avg_iv = average_iv(call_option, put_option)
     logger.info(f"Implied Volatility: {avg_iv}")
 
-    high_vol_threshold = 0.5  # Adjust this threshold as needed
-
-    if avg_iv > high_vol_threshold:
+    if avg_iv > HIGH_VOL_THRESHOLD:
         logger.info(
             f"High volatility detected: {avg_iv}. Finding best strangle opportunity..."
         )
@@ -85,16 +88,15 @@ def trade_strangle_without_kelly(ticker) -> None:
             # Buy the strangle with same-week expiration
             # bought_call, bought_put = buy_strangle(ticker, call_option, put_option)
             logger.info("Simulated buy and started monitoring")
-            calls_sold = monitor_trade_and_sell(call_option)
-            puts_sold = monitor_trade_and_sell(put_option)
+            # Both legs ride the same market data request and react in the same cycle
+            legs_sold = monitor_trades_and_sell([call_option, put_option])
             # Monitor the trade for take-profit and stop-loss
-            # calls_bought = monitor_trade_and_sell(bought_call)
-            # puts_bought = monitor_trade_and_sell(bought_put)
+            # legs_sold = monitor_trades_and_sell([bought_call, bought_put])
         else:
             logger.info("LOW probability of winning. Skipping trade.")
     else:
         logger.info(
-            f"Volatility {avg_iv} is below the threshold of {high_vol_threshold}. Skipping trade."
+            f"Volatility {avg_iv} is below the threshold of {HIGH_VOL_THRESHOLD}. Skipping trade."
         )
 
 
@@ -14,47 +14,51 @@ import time
 
 # sys.path.append("../")
 from decimal import Decimal
+from typing import Optional
 
+import numpy as np
 from loguru import logger
 
+import numeric
 from models import Interval
+from resample import TIMEFRAMES, bucket_bounds
 from utils import (
     buy_option_limit_order,
     calculate_mean,
     calculate_std_dev,
     ensure_orders_are_filled,
     get_nearest_out_of_the_money_option_contract_details,
-    get_stock_historical_price_deltas,
-    log_in,
+    get_stock_historical_prices,
     monitor_trade_and_sell,
 )
 
-log_in()
 
-
-def identify_price_changes(ticker, chunk_interval_in_min: int) -> list[list]:
-    """Given a ticker and interval, it returns a list[list]
-    where the child lists contain the stock price movement
-    for the specified interval.
+def identify_price_changes(
+    ticker, chunk_interval_in_min: int, prices: Optional[dict] = None
+) -> np.ndarray:
+    """Given a ticker and interval, it returns the stock price movement
+    of every `chunk_interval_in_min` chunk of 5min candles.
      - A positive number is an uptrend
      - A negative number is a downtrend
+    Chunks line up with the market open (see resample.py). Pass `prices` (from
+    `get_stock_historical_prices`) to reuse one pull for several intervals.
     """
-    chunked_deltas = []
-    deltas_ten_min_interval = get_stock_historical_price_deltas(
-        ticker, Interval.five_min
-    )
-    for delta in range(0, len(deltas_ten_min_interval), int(chunk_interval_in_min / 5)):
-        chunked_deltas.append(
-            sum(
-                [
-                    Decimal(delta["open_to_close_price_delta"])
-                    for delta in deltas_ten_min_interval[
-                        delta : delta + int(chunk_interval_in_min / 5)
-                    ]
-                ]
-            )
-        )
-    return chunked_deltas
+    if prices is None:
+        prices = get_stock_historical_prices(ticker, Interval.five_min)
+    deltas = numeric.deltas(prices["open"], prices["close"])
+    t = prices["begins_at"].astype("datetime64[ms]").astype(np.int64)
+    return numeric.segment_sums(deltas, bucket_bounds(t, chunk_interval_in_min))
+
+
+def identify_price_changes_by_interval(
+    ticker, intervals_in_min: tuple[int, ...] = TIMEFRAMES
+) -> dict[int, np.ndarray]:
+    """`identify_price_changes` for every interval, off a single API request"""
+    prices = get_stock_historical_prices(ticker, Interval.five_min)
+    return {
+        minutes: identify_price_changes(ticker, minutes, prices)
+        for minutes in intervals_in_min
+    }
 
 
 @ensure_orders_are_filled
@@ -90,12 +94,13 @@ def history_repeats_itself(
     chunk_interval_in_min: int = 15,
     positions: int = 1,
 ):
+    call_details = put_details = None
     price_changes = identify_price_changes(ticker, chunk_interval_in_min)
     mean = calculate_mean(price_changes[-3:])
     std_dev = calculate_std_dev(price_changes[-3:], mean)
     ma_of_chunk = price_changes[-1]
-    logger.info(f"{chunk_interval_in_min*3}min Mean: {mean}")
-    logger.info(f"{chunk_interval_in_min*3}min Standard Deviation: {std_dev}")
+    logger.info(f"{chunk_interval_in_min * 3}min Mean: {mean}")
+    logger.info(f"{chunk_interval_in_min * 3}min Standard Deviation: {std_dev}")
     logger.info(f"{chunk_interval_in_min}min Moving Average: {ma_of_chunk}")
 
     # throwing numbers on these IFs - testing pending for legit logical parameters
@@ -108,7 +113,7 @@ def history_repeats_itself(
         # a lil more thinking needed for cases where we can't buy
         filled_call = buy_call(ticker, call_details, positions)
         logger.info(
-            f"Buy order filled - 1 CALL contract - {ticker} - {call_details["fair_midpoint_price"]}"
+            f"Buy order filled - 1 CALL contract - {ticker} - {call_details['fair_midpoint_price']}"
         )
     if mean < -0.15 and ma_of_chunk <= -0.15 and std_dev < 0.10:
         put_details = get_nearest_out_of_the_money_option_contract_details(
@@ -119,8 +124,11 @@ def history_repeats_itself(
         # a lil more thinking needed for cases where we can't buy
         filled_put = buy_put(ticker, put_details, positions)
         logger.info(
-            f"Buy order filled - 1 PUT contract - {ticker} - {put_details["fair_midpoint_price"]}"
+            f"Buy order filled - 1 PUT contract - {ticker} - {put_details['fair_midpoint_price']}"
         )
+    if not call_details and not put_details:
+        logger.info("No clear trend. Skipping trade.")
+        return
     monitor_trade_and_sell(
         option=call_details or put_details,
         take_profit=Decimal(take_profit),
@@ -129,5 +137,6 @@ def history_repeats_itself(
     )
 
 
-# Use 5, 10, 15, 30, 60min intervals
-history_repeats_itself("aapl", chunk_interval_in_min=10, positions=1)
+if __name__ == "__main__":
+    # Use 5, 10, 15, 30, 60min intervals
+    history_repeats_itself("aapl", chunk_interval_in_min=10, positions=1)
@@ -0,0 +1,161 @@
+"""
+Streaming indicators - every `update()` is O(1) no matter how long the session has been running.
+Until an indicator has seen `period` prices it works off whatever it has so far,
+same as the batch math the strategies used to do on `self.data`.
+
+For backtests `IndicatorCache` computes each (indicator, period, series) once for the whole
+history, and every strategy variation replays it instead of running its own.
+"""
+
+from collections import deque
+from typing import Iterable
+
+import numpy as np
+
+
+class RollingSMA:
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.value = None
+
+    def update(self, price: float) -> float:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+        self.value = self.total / len(self.window)
+        return self.value
+
+
+class EMA:
+    """Seeded with the SMA of the first `period` prices, then smoothed with 2 / (period + 1)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.value = None
+
+    def update(self, price: float) -> float:
+        self.count += 1
+        if self.count <= self.period:
+            # Warm-up: running mean of what we've got so far
+            prev = self.value or 0.0
+            self.value = prev + (price - prev) / self.count
+        else:
+            self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class WilderRSI:
+    """
+    Wilder's RSI: the first `period` gains/losses are averaged, after that
+    avg = (avg * (period - 1) + latest) / period
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.prev_price = None
+        self.count = 0  # price deltas seen
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def update(self, price: float) -> float:
+        if self.prev_price is not None:
+            delta = price - self.prev_price
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            self.count += 1
+            if self.count <= self.period:
+                self.avg_gain += (gain - self.avg_gain) / self.count
+                self.avg_loss += (loss - self.avg_loss) / self.count
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.prev_price = price
+
+        if self.avg_loss == 0:
+            self.value = 100
+        else:
+            rs = self.avg_gain / self.avg_loss
+            self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+INDICATORS = {"sma": RollingSMA, "ema": EMA, "rsi": WilderRSI}
+
+
+def sma_series(prices, period: int) -> np.ndarray:
+    """
+    Every value `RollingSMA` would give, bit for bit: its running total adds each price and
+    subtracts the one leaving the window in that order, and np.cumsum adds strictly left to right
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    steps = np.zeros(2 * len(prices))
+    steps[1::2] = prices
+    steps[2 * period :: 2] = -prices[: len(prices) - period]
+    totals = np.cumsum(steps)[1::2]
+    return totals / np.minimum(np.arange(1, len(prices) + 1), period)
+
+
+def indicator_series(indicator: str, prices, period: int) -> np.ndarray:
+    if indicator == "sma":
+        return sma_series(prices, period)
+    # The recursive ones can't be vectorized without changing the rounding - run the streaming
+    # version once over the whole history, that's still once per setting instead of per variation
+    streaming = INDICATORS[indicator](period)
+    return np.fromiter(
+        (streaming.update(float(price)) for price in prices),
+        dtype=np.float64,
+        count=len(prices),
+    )
+
+
+class ReplayIndicator:
+    """Same interface as the streaming indicators, but every `update()` just steps through a precomputed series"""
+
+    def __init__(self, series: np.ndarray):
+        # Plain floats - indexing a list is a lot cheaper per tick than a NumPy scalar
+        self.values = series.tolist()
+        self.index = -1
+        self.value = None
+
+    def update(self, price: float) -> float:
+        self.index += 1
+        self.value = self.values[self.index]
+        return self.value
+
+
+class IndicatorCache:
+    """
+    Indicator series for one dataset, stored in the history dict itself as "<indicator>.<period>.<series>"
+    arrays - so they're published to the worker processes along with the candles (see back_testing/parallel.py)
+    and whatever a worker computes on its own is reused by every variation it tests after that.
+    """
+
+    def __init__(self, history: dict):
+        self.history = history
+
+    @staticmethod
+    def key(indicator: str, period: int, series: str = "c") -> str:
+        return f"{indicator}.{period}.{series}"
+
+    def series(self, indicator: str, period: int, series: str = "c") -> np.ndarray:
+        key = self.key(indicator, period, series)
+        if (values := self.history.get(key)) is None:
+            values = indicator_series(indicator, self.history[series], period)
+            values.flags.writeable = False  # shared by every variation
+            self.history[key] = values
+        return values
+
+    def replay(self, indicator: str, period: int, series: str = "c") -> ReplayIndicator:
+        return ReplayIndicator(self.series(indicator, period, series))
+
+    def precompute(self, specs: Iterable[tuple[str, int]], series: str = "c") -> dict:
+        """Computes every (indicator, period) up front, returns the history with them added"""
+        for indicator, period in specs:
+            self.series(indicator, period, series)
+        return self.history
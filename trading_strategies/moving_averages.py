@@ -51,7 +51,9 @@ This strategy uses a combination of trend indicators, risk management, and time-
 
 
 from loguru import logger
-from strategy import Strategy, StrategyTester
+
+from trading_strategies.indicators import RollingSMA, WilderRSI
+from trading_strategies.strategy import Strategy, StrategyTester
 
 
 # We dont' know what our data looks like yet so this is just a placeholder
@@ -69,11 +71,35 @@ class MovingAverageStrategy(Strategy):
         self.rsi_period = rsi_period
         self.short_ma_period = short_ma_period
         self.long_ma_period = long_ma_period
+        # Indicators are updated once per price so each tick is O(1) regardless of how much data we have
+        self.ma_short = RollingSMA(short_ma_period)
+        self.ma_long = RollingSMA(long_ma_period)
+        self.rsi = WilderRSI(rsi_period)
+        for price in self.data:
+            self._update_indicators(price)
+
+    def signals(self, cache):
+        ma_short = cache.series("sma", self.short_ma_period)
+        ma_long = cache.series("sma", self.long_ma_period)
+        rsi = cache.series("rsi", self.rsi_period)
+        return (ma_short > ma_long) & (rsi < self.rsi_threshold), ma_short <= ma_long
+
+    def use_indicators(self, cache) -> None:
+        self.ma_short = cache.replay("sma", self.short_ma_period)
+        self.ma_long = cache.replay("sma", self.long_ma_period)
+        self.rsi = cache.replay("rsi", self.rsi_period)
+
+    def update(self, price) -> None:
+        super().update(price)
+        self._update_indicators(price)
+
+    def _update_indicators(self, price) -> None:
+        self.ma_short.update(price)
+        self.ma_long.update(price)
+        self.rsi.update(price)
 
     def should_buy(self) -> bool:
-        ma_short = self._calculate_moving_average(self.short_ma_period)
-        ma_long = self._calculate_moving_average(self.long_ma_period)
-        rsi = self._calculate_rsi()
+        ma_short, ma_long, rsi = self.ma_short.value, self.ma_long.value, self.rsi.value
         logger.info(f"Short MA: {ma_short}, Long MA: {ma_long}, RSI: {rsi}")
 
         if ma_short > ma_long and rsi < self.rsi_threshold:
@@ -82,9 +108,7 @@ class MovingAverageStrategy(Strategy):
         return False
 
     def should_sell(self) -> bool:
-        ma_short = self._calculate_moving_average(self.short_ma_period)
-        ma_long = self._calculate_moving_average(self.long_ma_period)
-        rsi = self._calculate_rsi()
+        ma_short, ma_long, rsi = self.ma_short.value, self.ma_long.value, self.rsi.value
         logger.info(f"Short MA: {ma_short}, Long MA: {ma_long}, RSI: {rsi}")
 
         if ma_short <= ma_long:
@@ -92,32 +116,6 @@ class MovingAverageStrategy(Strategy):
             return True
         return False
 
-    def _calculate_rsi(self) -> float:
-        gains, losses = 0, 0
-        for i in range(1, len(self.data)):
-            delta = self.data[i] - self.data[i - 1]
-            if delta > 0:
-                gains += delta
-            else:
-                losses -= delta
-
-        if len(self.data) < self.rsi_period:
-            avg_gain = gains / len(self.data)
-            avg_loss = losses / len(self.data)
-        else:
-            avg_gain = gains / self.rsi_period
-            avg_loss = losses / self.rsi_period
-
-        if avg_loss == 0:
-            return 100
-        rs = avg_gain / avg_loss
-        return 100 - (100 / (1 + rs))
-
-    def _calculate_moving_average(self, ma_period):
-        if len(self.data) < ma_period:
-            return sum(self.data) / len(self.data)
-        return sum(self.data[-ma_period:]) / ma_period
-
 
 class MovingAverageStrategyTester(StrategyTester):
     @property
@@ -129,6 +127,18 @@ class MovingAverageStrategyTester(StrategyTester):
             "long_ma_period": (30, 50),
         }
 
+    @property
+    def indicators(self) -> list[tuple[str, int]]:
+        params = self.strategy_parameters
+
+        def periods(name: str) -> range:
+            return range(params[name][0], params[name][1] + 1)
+
+        ma_periods = set(periods("short_ma_period")) | set(periods("long_ma_period"))
+        return [("sma", p) for p in sorted(ma_periods)] + [
+            ("rsi", p) for p in periods("rsi_period")
+        ]
+
     @property
     def strategy_type(self):
         return MovingAverageStrategy
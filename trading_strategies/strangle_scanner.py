@@ -0,0 +1,159 @@
+"""
+Scans a whole universe for strangle candidates instead of one hard-coded ticker:
+
+    python -m trading_strategies.strangle_scanner data_visualization/stock_lists/mag7.json
+    python -m trading_strategies.strangle_scanner AAPL TSLA NVDA --budget 30
+
+Every ticker costs one `find_best_strikes` (price + call/put chains + 2 quotes). Tickers run
+concurrently but the requests they fire are paced by a token bucket, and whatever hasn't
+finished when the time budget runs out is dropped from that scan.
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from broker import TokenBucket, request_priority
+from models import RequestPriority
+from trading_strategies.da_no_kelly_strangle import (
+    HIGH_VOL_THRESHOLD,
+    average_iv,
+    calculate_prob_win,
+)
+from utils import closest_friday, find_best_strikes
+
+# Requests one ticker costs on a cold strike ladder cache
+REQUESTS_PER_TICKER = 5
+# Robinhood doesn't publish limits - this stays well under what gets throttled
+REQUESTS_PER_SECOND = 10
+MAX_WORKERS = 16
+TIME_BUDGET_SECONDS = 120
+
+
+@dataclass
+class StrangleCandidate:
+    ticker: str
+    call_strike: Decimal
+    put_strike: Decimal
+    avg_iv: Decimal
+    prob_win: Decimal
+
+    @property
+    def high_volatility(self) -> bool:
+        return self.avg_iv > HIGH_VOL_THRESHOLD
+
+
+def load_tickers(source: str | Path | list[str]) -> list[str]:
+    """A list of tickers or a `stock_lists/*.json` file ({"tickers": [...]})"""
+    if isinstance(source, (str, Path)):
+        with open(source) as f:
+            source = json.load(f)["tickers"]
+    return list(dict.fromkeys(ticker.upper() for ticker in source))
+
+
+def _scan_ticker(
+    ticker: str, exp_date: str, bucket: TokenBucket, deadline: float
+) -> Optional[StrangleCandidate]:
+    while wait_time := bucket.try_acquire(REQUESTS_PER_TICKER):
+        if time.monotonic() + wait_time > deadline:
+            return None  # out of budget before it even started
+        time.sleep(wait_time)
+    # Open positions and orders go first, see broker/scheduler.py
+    with request_priority(RequestPriority.scan):
+        call_option, put_option = find_best_strikes(ticker, exp_date)
+    return StrangleCandidate(
+        ticker=ticker,
+        call_strike=Decimal(call_option["strike_price"]),
+        put_strike=Decimal(put_option["strike_price"]),
+        avg_iv=average_iv(call_option, put_option),
+        prob_win=calculate_prob_win(call_option, put_option),
+    )
+
+
+def scan_strangles(
+    tickers: str | Path | list[str],
+    exp_date: Optional[str] = None,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    max_workers: int = MAX_WORKERS,
+    time_budget: float = TIME_BUDGET_SECONDS,
+) -> list[StrangleCandidate]:
+    """Every ticker that could be scanned within `time_budget`, best candidates (highest IV, then prob_win) first"""
+    tickers = load_tickers(tickers)
+    exp_date = exp_date or closest_friday()
+    started = time.monotonic()
+    deadline = started + time_budget
+    bucket = TokenBucket(
+        requests_per_second, max(requests_per_second, REQUESTS_PER_TICKER)
+    )
+    candidates, failed, out_of_time = [], 0, 0
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scanner")
+    pending = {
+        pool.submit(_scan_ticker, ticker, exp_date, bucket, deadline): ticker
+        for ticker in tickers
+    }
+    try:
+        while pending and (remaining := deadline - time.monotonic()) > 0:
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    candidate = future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.warning(f"Skipping {ticker}: {e}")
+                    continue
+                if candidate:
+                    candidates.append(candidate)
+                else:
+                    out_of_time += 1
+    finally:
+        # Don't hold the caller up for requests that are already in flight
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(
+        f"Scanned {len(candidates)}/{len(tickers)} tickers in {time.monotonic() - started:.1f}s"
+        f" ({failed} failed, {out_of_time + len(pending)} out of time budget)"
+    )
+    candidates.sort(key=lambda c: (c.avg_iv, c.prob_win), reverse=True)
+    return candidates
+
+
+def format_table(candidates: list[StrangleCandidate]) -> str:
+    lines = [
+        f"{'#':>3}  {'ticker':<6} {'call':>9} {'put':>9} {'avg IV':>8} {'prob win':>9}  high vol"
+    ]
+    for rank, c in enumerate(candidates, start=1):
+        lines.append(
+            f"{rank:>3}  {c.ticker:<6} {c.call_strike:>9.2f} {c.put_strike:>9.2f}"
+            f" {c.avg_iv:>8.4f} {c.prob_win:>9.4f}  {'yes' if c.high_volatility else ''}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank strangle candidates by IV")
+    parser.add_argument("tickers", nargs="+", help="tickers or a stock_lists json file")
+    parser.add_argument("--exp-date", default=None)
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET_SECONDS)
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND)
+    args = parser.parse_args()
+
+    source = args.tickers[0] if args.tickers[0].endswith(".json") else args.tickers
+    print(
+        format_table(
+            scan_strangles(
+                source,
+                exp_date=args.exp_date,
+                requests_per_second=args.rate,
+                time_budget=args.budget,
+            )
+        )
+    )
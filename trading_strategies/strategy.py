@@ -3,6 +3,20 @@ class Strategy:
         # This data will be the historical and live prices of the stock
         self.data = data
 
+    def update(self, price) -> None:
+        # Feed the latest price in before asking should_buy/should_sell
+        self.data.append(price)
+
+    def signals(self, cache):
+        # Backtests: (buy, sell) bool arrays for the whole history, if the strategy's signals only
+        # depend on indicators. Returning None replays it tick by tick instead
+        return None
+
+    def use_indicators(self, cache) -> None:
+        # Backtests: swap the streaming indicators for the shared precomputed ones (IndicatorCache).
+        # Has to happen before the first update
+        pass
+
     def should_buy(self) -> bool:
         raise NotImplementedError
 
@@ -19,6 +33,11 @@ class StrategyTester:
     def strategy_parameters(self) -> dict:
         return {}
 
+    @property
+    def indicators(self) -> list[tuple[str, int]]:
+        # Every (indicator, period) any variation in the sweep uses, so they're computed once up front
+        return []
+
     @property
     def strategy_type(self):
         return Strategy
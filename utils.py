@@ -1,17 +1,21 @@
+import contextvars
 import math
-import os
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Any, Optional
 
-import pyotp
-import robin_stocks.robinhood as r
-from dotenv import load_dotenv
+import numpy as np
 from loguru import logger
 
+import numeric
+from broker import is_live, r
 from exceptions import NoStrikePriceError
+from fill_tracker import fill_tracker
 from models import Bounds, Interval, OptionType, Span
+from position_monitor import position_monitor
 
 
 def closest_friday() -> str:
@@ -20,45 +24,124 @@ def closest_friday() -> str:
     return (today + timedelta((4 - today.weekday()) % 7)).strftime("%Y-%m-%d")
 
 
-# Function to fetch the nearest expiration date and most profitable strike
-# ~14sec slower on avg than `get_closest_strike_price()`
-def find_best_strikes(ticker, exp_date) -> tuple[dict, dict]:
-    stock_price = Decimal(r.stocks.get_latest_price(ticker)[0])
+# robin_stocks blocks, so independent requests (price + both chains, both quotes) go out on this pool
+MAX_CONCURRENT_REQUESTS = 8
+_requests = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="rh-request"
+)
+
+
+def _submit(func, *args) -> Future:
+    # Carries the caller's request priority over to the pool thread
+    return _requests.submit(contextvars.copy_context().run, func, *args)
+
+
+# Strike ladders barely change during the day, so one chain fetch serves every lookup until it expires
+STRIKE_LADDER_TTL_SECONDS = 15 * 60
+
+
+@dataclass
+class StrikeLadder:
+    """Every tradable contract for a (ticker, expiration date, option type), sorted by strike"""
+
+    strikes: np.ndarray  # float64, parsed once per chain fetch
+    options: list[dict]  # instrument data, same order as `strikes`
+    fetched_at: float
+
+    def out_of_the_money(self, price: Decimal, option_type: OptionType) -> dict | None:
+        """Closest strike at/above the price for calls, at/below it for puts"""
+        if option_type == OptionType.call:
+            i = int(np.searchsorted(self.strikes, float(price), side="left"))
+            return self.options[i] if i < len(self.strikes) else None
+        i = int(np.searchsorted(self.strikes, float(price), side="right")) - 1
+        return self.options[i] if i >= 0 else None
+
+    def closest(self, price: Decimal) -> dict | None:
+        """Closest strike to the price on either side"""
+        if not len(self.strikes):
+            return None
+        return self.options[int(np.abs(self.strikes - float(price)).argmin())]
+
+
+# (ticker, expiration date, option type) -> StrikeLadder
+_strike_ladders: dict[tuple[str, str, OptionType], StrikeLadder] = {}
+
 
-    # Fetch call and put options for the nearest expiration date
-    call_options = r.options.find_options_by_expiration(
-        ticker, expirationDate=exp_date, optionType=OptionType.call
+def get_strike_ladder(
+    ticker: str,
+    exp_date: str,
+    option_type: OptionType,
+    ttl: float = STRIKE_LADDER_TTL_SECONDS,
+) -> StrikeLadder:
+    """One chain fetch per (ticker, expiration, type) until the TTL runs out"""
+    key = (ticker.upper(), exp_date, OptionType(option_type))
+    ladder = _strike_ladders.get(key)
+    if ladder and time.monotonic() - ladder.fetched_at < ttl:
+        return ladder
+
+    # Instrument data only - `find_options_by_expiration` would also pull
+    # market data for every single contract in the chain (1 request each)
+    chain = r.options.find_tradable_options(
+        ticker, expirationDate=exp_date, optionType=option_type
     )
-    put_options = r.options.find_options_by_expiration(
-        ticker, expirationDate=exp_date, optionType=OptionType.put
+    options = sorted(
+        (
+            option
+            for option in chain
+            if option and option.get("expiration_date") == exp_date
+        ),
+        key=lambda option: Decimal(option["strike_price"]),
     )
+    ladder = StrikeLadder(
+        strikes=numeric.as_array([option["strike_price"] for option in options]),
+        options=options,
+        fetched_at=time.monotonic(),
+    )
+    _strike_ladders[key] = ladder
+    return ladder
+
+
+def with_market_data(option: dict) -> dict:
+    """Instrument data + its current quote/greeks (1 API call)"""
+    market_data = r.options.get_option_market_data_by_id(option["id"])
+    return {**option, **market_data[0]} if market_data else dict(option)
+
+
+# Function to fetch the nearest expiration date and most profitable strike
+def find_best_strikes(ticker, exp_date) -> tuple[dict, dict]:
+    """
+    The call and put closest to the stock price, with their market data.
+    The price and both chains are fetched concurrently, then both quotes - so spin-up takes
+    as long as the slowest request of each round, not the sum of all of them.
+    """
+    price = _submit(r.stocks.get_latest_price, ticker)
+    call_ladder = _submit(get_strike_ladder, ticker, exp_date, OptionType.call)
+    put_ladder = _submit(get_strike_ladder, ticker, exp_date, OptionType.put)
+    stock_price = Decimal(price.result()[0])
 
     # Find the strike prices closest to the current stock price
-    best_call_option = min(
-        call_options, key=lambda x: abs(Decimal(x["strike_price"]) - stock_price)
-    )
-    best_put_option = min(
-        put_options, key=lambda x: abs(Decimal(x["strike_price"]) - stock_price)
-    )
+    best_call_option = call_ladder.result().closest(stock_price)
+    best_put_option = put_ladder.result().closest(stock_price)
+    if not best_call_option or not best_put_option:
+        raise NoStrikePriceError(f"No {ticker} options expiring on {exp_date}")
 
-    return best_call_option, best_put_option
+    call = _submit(with_market_data, best_call_option)
+    put = _submit(with_market_data, best_put_option)
+    return call.result(), put.result()
 
 
 def ensure_orders_are_filled(func):
+    """
+    Places the orders returned by `func` ONCE and blocks until every one of them is filled.
+    Fill polling is shared with every other pending order in the process (see `fill_tracker.py`).
+    """
+
     def wrapper(*args, **kwargs):
-        all_filled = None
-        filled_orders = 0
-        while not all_filled:
-            time.sleep(2)
-            orders = func(*args, **kwargs)
-            for order in orders:
-                if is_option_position_bought(order["id"]):
-                    filled_orders += 1
-            if filled_orders == len(orders):
-                all_filled = True
-                logger.info("Success - Orders filled")
-            logger.info("Failure - Orders not filled. Trying again...")
-        return orders
+        orders = func(*args, **kwargs)
+        fills = [fill_tracker.track(order) for order in orders]
+        filled_orders = [fill.result() for fill in fills]
+        logger.info("Success - Orders filled")
+        return filled_orders
 
     return wrapper
 
@@ -72,19 +155,17 @@ def round_to_nearest_half_dollar(
         return Decimal(math.floor(price * 2) / 2)
 
 
-def calculate_mean(list) -> Decimal:
-    return Decimal(sum(list) / len(list))
+def calculate_mean(values) -> float | Decimal:
+    return numeric.mean(values)
 
 
-def calculate_std_dev(list, mean: Decimal) -> Decimal:
-    variance = sum((x - mean) ** 2 for x in list) / len(list)
-    return Decimal(math.sqrt(variance))
+def calculate_std_dev(values, mean: float | Decimal) -> float | Decimal:
+    return numeric.std_dev(values, mean)
 
 
 def log_in() -> dict | None:
-    load_dotenv()
-    totp = pyotp.TOTP(os.getenv("MFA_CODE")).now()
-    return r.login(os.getenv("EMAIL"), os.getenv("PASSWORD"), mfa_code=totp)
+    """Optional - the broker logs in (or reuses the saved session) on its first API call anyway"""
+    return r.login()
 
 
 def current_stock_price(ticker: str | list[str]) -> dict | list[dict]:
@@ -127,59 +208,73 @@ def at_stop_loss(
 
 # Note: Extended and Trading hours FORCE you to use a 'day' time window - whatever
 # Note: Default args for the daily pre-market prep - shift args for subsequent calls as needed
+def get_stock_historical_prices(
+    ticker: str,
+    candle_interval: Optional[Interval] = Interval.ten_min,
+    time_window: Optional[Span] = Span.day,
+    trading_hours: Optional[Bounds] = Bounds.extended,
+) -> dict[str, np.ndarray]:
+    """Candles as columns: `begins_at` (UTC datetime64) and float64 `open`/`close`/`high`/`low`"""
+    raw_data = r.stocks.get_stock_historicals(
+        ticker, candle_interval, time_window, trading_hours
+    )
+    return {
+        # Time is UTC so market hours are 14:30 to 21:00
+        "begins_at": np.array(
+            [entry["begins_at"].rstrip("Z") for entry in raw_data],
+            dtype="datetime64[s]",
+        ),
+        **{
+            column: numeric.as_array([entry[f"{column}_price"] for entry in raw_data])
+            for column in ("open", "close", "high", "low")
+        },
+    }
+
+
 def get_stock_historical_price_deltas(
-    ticker: str | list[str],
+    ticker: str,
     candle_interval: Optional[Interval] = Interval.ten_min,
     time_window: Optional[Span] = Span.day,
     trading_hours: Optional[Bounds] = Bounds.extended,
 ) -> list[dict]:
-    curated_data = []
-    raw_data = r.stocks.get_stock_historicals(
+    prices = get_stock_historical_prices(
         ticker, candle_interval, time_window, trading_hours
     )
-    for entry in raw_data:
-        curated_data.append(
-            {
-                # Time is UTC so market hours are 14:30 to 21:00
-                "datetime": entry["begins_at"],
-                "open_to_close_price_delta": (
-                    str(Decimal(entry["close_price"]) - Decimal(entry["open_price"]))
-                ),
-            }
+    deltas = numeric.deltas(prices["open"], prices["close"])
+    return [
+        {"datetime": str(begins_at) + "Z", "open_to_close_price_delta": delta}
+        for begins_at, delta in zip(
+            prices["begins_at"],
+            deltas.tolist() if isinstance(deltas, np.ndarray) else deltas,
         )
-    return curated_data
+    ]
 
 
-def get_closest_strike_price(ticker: str, option_type: OptionType) -> Decimal:
-    # TODO: Performance can be improved by getting a list of all strike prices
-    # for that ticker, sort that array and grab the closest one above the current price.
-    # It'll be 1 API call + static array sorting and indexing vs a max of 5 API calls
+def get_closest_out_of_the_money_option(
+    ticker: str, option_type: OptionType, exp_date: Optional[str] = None
+) -> dict:
+    """Instrument data for the closest out-of-the-money contract (no API calls on a warm ladder)"""
+    exp_date = exp_date or closest_friday()
     price = Decimal(r.stocks.get_latest_price(ticker)[0])
-    nearest_half_dollar_increment = round_to_nearest_half_dollar(price, option_type)
     logger.info(
         f"Current Stock price: {price} \nFinding closest out-of-the-money strike price..."
     )
+    option = get_strike_ladder(ticker, exp_date, option_type).out_of_the_money(
+        price, option_type
+    )
+    if not option:
+        raise NoStrikePriceError(
+            f"No out-of-the-money {option_type.value} strike price found for {ticker} expiring on {exp_date}"
+        )
+    logger.info(f"Closest strike price: {option['strike_price']}")
+    return option
 
-    if r.options.find_options_by_strike(
-        ticker, nearest_half_dollar_increment, option_type, info="expiration_date"
-    ):
-        logger.info(f"Closest strike price: {nearest_half_dollar_increment}")
-        return nearest_half_dollar_increment
 
-    for i in range(4):
-        if option_type == OptionType.call:
-            nearest_half_dollar_increment = nearest_half_dollar_increment + Decimal(0.5)
-        if option_type == OptionType.put:
-            nearest_half_dollar_increment = nearest_half_dollar_increment - Decimal(0.5)
-
-        if r.options.find_options_by_strike(
-            ticker, nearest_half_dollar_increment, option_type, info="expiration_date"
-        ):
-            logger.info(f"Closest strike price: {nearest_half_dollar_increment}")
-            return nearest_half_dollar_increment
-    raise NoStrikePriceError(
-        f"No strike price found for {ticker} within 2.5 dollars of the current stock price"
-    )
+def get_closest_strike_price(
+    ticker: str, option_type: OptionType, exp_date: Optional[str] = None
+) -> Decimal:
+    option = get_closest_out_of_the_money_option(ticker, option_type, exp_date)
+    return Decimal(option["strike_price"])
 
 
 def get_nearest_out_of_the_money_option_contract_details(
@@ -188,25 +283,21 @@ def get_nearest_out_of_the_money_option_contract_details(
     """
     - This will find find the closest out-of-the-money option contract for the ticker and option type requested.
     - The expiration date, unless specified, will default to the closest Friday
-    - The strike price is set by looking .5 to 1 dollar above the current stock price
+    - The strike price is the closest one above (call) or below (put) the current stock price
     Arguments:
         ticker: The stock ticker
         call_or_put: The option type -> 'call' or 'put'
         exp_date (optional): Option exp date in YYYY-MM-DD format
             - Default -> Nearest Friday
     """
-    if not exp_date:
-        next_friday = closest_friday()
-    if details := r.options.find_options_by_expiration_and_strike(
-        inputSymbols=ticker,
-        optionType=call_or_put,
-        expirationDate=exp_date if exp_date else next_friday,
-        strikePrice=get_closest_strike_price(ticker, call_or_put),
-    ):
-        details = details[0]
+    details = with_market_data(
+        get_closest_out_of_the_money_option(ticker, OptionType(call_or_put), exp_date)
+    )
     if details["state"] == "active" and details["tradability"] == "tradable":
         return {
+            "id": details["id"],
             "symbol": details["chain_symbol"],
+            "type": details["type"],
             "expiration_date": details["expiration_date"],
             "strike_price": details["strike_price"],
             "last_trade_price": details["last_trade_price"],
@@ -245,44 +336,54 @@ def is_option_position_bought(option_id) -> bool:
 
 
 @ensure_orders_are_filled
+def monitor_trades_and_sell(
+    options: list[dict],
+    take_profit: Decimal = Decimal("0.05"),
+    stop_loss: Decimal = Decimal("0.02"),
+    positions=1,
+    poll_interval: float = 2,
+) -> list[dict]:
+    """
+    Watches every leg together (one batched market data request per cycle, see `position_monitor.py`)
+    and sells each one as soon as it hits its take-profit or stop-loss.
+    """
+    exits = [
+        position_monitor.watch(option, take_profit, stop_loss, poll_interval)
+        for option in options
+    ]
+    sold_options = []
+    try:
+        for triggered in as_completed(exits):
+            exit = triggered.result()
+            sold_options.append(
+                sell_option_limit_order(
+                    exit.option["chain_symbol"],
+                    OptionType(exit.option.get("type", OptionType.call)),
+                    exit.option["strike_price"],
+                    exit.option["expiration_date"],
+                    positions,
+                    exit.value,
+                )
+            )
+    finally:
+        # A failed sell leaves the other legs registered - the monitor would keep polling
+        # market data for them with nobody waiting on their Futures
+        for option, exit in zip(options, exits):
+            if not exit.done():
+                position_monitor.unwatch(option["id"])
+    return sold_options
+
+
 def monitor_trade_and_sell(
-    option, take_profit: Decimal = 0.05, stop_loss: Decimal = 0.02, positions=1
-) -> None:
-    initial_total_value = Decimal(option["fair_midpoint_price"] or option["mark_price"])
-
-    # Refresh option data
-    refreshed_option_info = r.options.get_option_market_data_by_id(option["id"])[0]
-    current_total_value = (
-        Decimal(refreshed_option_info["adjusted_mark_price"])
-        + Decimal(refreshed_option_info["ask_price"])
-    ) / 2
-
-    profit_pct = (current_total_value - initial_total_value) / initial_total_value
-
-    logger.info(f"Current Profit: {profit_pct*100:.2f}%")
-
-    if profit_pct >= take_profit:
-        logger.info("Take-profit triggered, closing positions.")
-        sold_option = sell_option_limit_order(
-            option["chain_symbol"],
-            OptionType.call,
-            option["strike_price"],
-            option["expiration_date"],
-            positions,
-            current_total_value,
-        )
-        return [sold_option]
-    elif profit_pct <= -stop_loss:
-        logger.info("Stop-loss triggered, closing positions.")
-        sold_option = sell_option_limit_order(
-            option["chain_symbol"],
-            OptionType.call,
-            option["strike_price"],
-            option["expiration_date"],
-            positions,
-            current_total_value,
-        )
-        return [sold_option]
+    option,
+    take_profit: Decimal = Decimal("0.05"),
+    stop_loss: Decimal = Decimal("0.02"),
+    positions=1,
+    poll_interval: float = 2,
+) -> list[dict]:
+    return monitor_trades_and_sell(
+        [option], take_profit, stop_loss, positions, poll_interval
+    )
 
 
 def buy_option_limit_order(
@@ -294,11 +395,12 @@ def buy_option_limit_order(
     option_price: float | Decimal,
     time_in_force: str = "ioc",
 ) -> dict | Any:
-    raise Exception("Don't want to buy options right now")
+    if is_live():
+        raise Exception("Don't want to buy options right now")
     return r.orders.order_buy_option_limit(
         positionEffect="open",
         creditOrDebit="debit",
-        price=option_price,
+        price=numeric.money(option_price),
         symbol=ticker,
         quantity=quantity,
         expirationDate=exp_date,
@@ -317,12 +419,13 @@ def sell_option_limit_order(
     option_price: float | Decimal,
     time_in_force: str = "ioc",
 ) -> dict | Any:
-    raise Exception("Don't want to sell options right now")
+    if is_live():
+        raise Exception("Don't want to sell options right now")
     # TODO: We need to monitor if we've actually sold the contracts. Putting them up for sale doesn't mean they've been sold.
     return r.orders.order_sell_option_limit(
         positionEffect="close",
         creditOrDebit="credit",
-        price=option_price,
+        price=numeric.money(option_price),
         symbol=ticker,
         quantity=quantity,
         expirationDate=exp_date,